@@ -0,0 +1,72 @@
+"""
+Awaitable facade over DBHandler for the asyncio pipeline and Telegram handlers.
+
+Reads run on a small pool of reader threads, each holding its own persistent
+connection. Writes go through a single writer thread whose executor queue
+serializes them, so a slow write never blocks the event loop and writers
+never contend with each other.
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from config import DB_READ_THREADS
+from db import DBHandler, DB_PATH, close_connections
+
+logger = logging.getLogger("jobbot.async_db")
+
+# DBHandler methods with these prefixes modify the database and go to the writer thread
+_WRITE_PREFIXES = ("add_", "save_", "mark_", "set_", "delete_", "record_")
+
+
+class AsyncDBHandler:
+    def __init__(self, db_path: str = DB_PATH, read_threads: int = DB_READ_THREADS):
+        self.db = DBHandler(db_path)
+        self._readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+    async def _run(self, executor: ThreadPoolExecutor, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        """Expose every public DBHandler method as a coroutine on the right thread."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self.db, name)
+        if not callable(method):
+            return method
+        executor = self._writer if name.startswith(_WRITE_PREFIXES) else self._readers
+
+        async def call(*args, **kwargs):
+            return await self._run(executor, method, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    async def close(self):
+        """Stop the DB threads once their queued calls have run."""
+        await self._run(self._writer, close_connections)
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+
+_async_db: Optional[AsyncDBHandler] = None
+
+
+def get_async_db() -> AsyncDBHandler:
+    """Return the process-wide AsyncDBHandler (one writer thread per process)."""
+    global _async_db
+    if _async_db is None:
+        _async_db = AsyncDBHandler()
+    return _async_db
+
+
+async def close_async_db():
+    """Close the process-wide AsyncDBHandler, if one was created."""
+    global _async_db
+    if _async_db is not None:
+        await _async_db.close()
+        _async_db = None
@@ -0,0 +1,262 @@
+"""
+Ad-hoc performance benchmarks for the job bot.
+
+Usage:
+    python benchmarks.py startup
+    python benchmarks.py ranker [--backends torch onnx] [--jobs 512]
+    python benchmarks.py parity [--backend onnx]
+    python benchmarks.py db-write [--sizes 1000 10000]
+    python benchmarks.py memory [--sizes 10000 100000]
+    python benchmarks.py parse [--repeat 20]
+"""
+import os
+import sys
+import json
+import argparse
+import time
+import tempfile
+import subprocess
+import tracemalloc
+
+# Run in a fresh interpreter so module caches from this process don't skew timings
+_STARTUP_SCRIPT = """
+import json, resource, time
+t0 = time.perf_counter()
+import huggingface_ranker
+t1 = time.perf_counter()
+rss_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+huggingface_ranker.warmup()
+t2 = time.perf_counter()
+rss_warm = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"import_s": t1 - t0, "warmup_s": t2 - t1, "rss_import_kb": rss_import, "rss_warm_kb": rss_warm}))
+"""
+
+
+def bench_startup(args):
+    """
+    Time `import huggingface_ranker` and the explicit warmup() that follows.
+    Before lazy loading, the import paid for both; now only warmup() does.
+    """
+    runs = []
+    for _ in range(args.repeat):
+        out = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    best = min(runs, key=lambda r: r["import_s"])
+    print(f"import huggingface_ranker : {best['import_s'] * 1000:8.1f} ms  (max RSS {best['rss_import_kb'] / 1024:.0f} MB)")
+    print(f"warmup()                  : {best['warmup_s'] * 1000:8.1f} ms  (max RSS {best['rss_warm_kb'] / 1024:.0f} MB)")
+    print(f"eager-import equivalent   : {(best['import_s'] + best['warmup_s']) * 1000:8.1f} ms")
+
+
+_RANKER_SCRIPT = """
+import json, resource, sys, time
+import huggingface_ranker as hr
+n = int(sys.argv[1])
+texts = [f"Job {i}. " + hr.PARITY_SAMPLES[i % len(hr.PARITY_SAMPLES)] for i in range(n)]
+t0 = time.perf_counter()
+model = hr.get_embedding_model()
+sentiment = hr.get_sentiment_pipeline()
+t1 = time.perf_counter()
+model.encode(texts, batch_size=32, convert_to_numpy=True)
+t2 = time.perf_counter()
+sentiment(texts, batch_size=16)
+t3 = time.perf_counter()
+print(json.dumps({
+    "backend": hr.BACKEND,
+    "load_s": t1 - t0,
+    "embed_per_s": n / (t2 - t1),
+    "sentiment_per_s": n / (t3 - t2),
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def bench_ranker(args):
+    """Embedding/sentiment throughput and peak RSS for each inference backend."""
+    for backend in args.backends:
+        env = dict(os.environ, RANKER_BACKEND=backend)
+        out = subprocess.run(
+            [sys.executable, "-c", _RANKER_SCRIPT, str(args.jobs)], capture_output=True, text=True, env=env
+        )
+        if out.returncode != 0:
+            print(f"{backend:6}: failed\n{out.stderr.strip()}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{r['backend']:6}: load {r['load_s']:6.1f} s | embed {r['embed_per_s']:7.1f} texts/s | "
+            f"sentiment {r['sentiment_per_s']:7.1f} texts/s | max RSS {r['rss_kb'] / 1024:.0f} MB"
+        )
+
+
+def bench_parity(args):
+    """Check the selected backend's scores against the fp32 torch reference."""
+    import huggingface_ranker
+
+    result = huggingface_ranker.check_backend_parity(args.backend)
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result["ok"] else 1)
+
+
+def _synthetic_jobs(n: int, prefix: str = "bench"):
+    from job import Job
+
+    return [
+        Job(
+            id=f"{prefix}:{i}",
+            source="indeed",
+            title=f"Warehouse operative {i}",
+            company=f"Company {i % 500}",
+            location="Leigh",
+            salary=21000.0,
+            description="Picking and packing orders, loading vans, manual handling. " * 4,
+            url=f"https://www.indeed.com/viewjob?jk={i}",
+            company_rating=7,
+            company_summary="7/10 rating from 12 reviews.",
+            cv_match_score=0.8,
+        )
+        for i in range(n)
+    ]
+
+
+def bench_db_write(args):
+    """Per-row add_job() vs. one-transaction save_jobs() on a fresh database."""
+    from db import DBHandler
+
+    for n in args.sizes:
+        jobs = _synthetic_jobs(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            per_row = DBHandler(os.path.join(tmp, "per_row.db"))
+            t0 = time.perf_counter()
+            for job in jobs:
+                per_row.add_job(job)
+            t1 = time.perf_counter()
+
+            bulk = DBHandler(os.path.join(tmp, "bulk.db"))
+            t2 = time.perf_counter()
+            counts = bulk.save_jobs(jobs)
+            t3 = time.perf_counter()
+            bulk.save_jobs(jobs)  # second pass exercises the update path
+            t4 = time.perf_counter()
+
+        print(
+            f"{n:>6} jobs: add_job {t1 - t0:7.3f} s | save_jobs insert {t3 - t2:7.3f} s "
+            f"({(t1 - t0) / (t3 - t2):5.1f}x) | save_jobs update {t4 - t3:7.3f} s | {counts}"
+        )
+
+
+def _traced_bytes(build) -> int:
+    """Bytes still allocated by build()'s result once it returns."""
+    tracemalloc.start()
+    try:
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def bench_memory(args):
+    """
+    Memory held by n jobs as per-row dicts (the old _row_to_dict shape) vs.
+    slotted Job records, built from the same DB row tuples. The field values
+    are shared, so this measures the per-record container overhead.
+    """
+    from job import Job, DB_COLUMNS
+
+    for n in args.sizes:
+        rows = [tuple(getattr(job, column) for column in DB_COLUMNS) for job in _synthetic_jobs(n)]
+        as_dicts = _traced_bytes(lambda: [dict(zip(DB_COLUMNS, row)) for row in rows])
+        as_jobs = _traced_bytes(lambda: [Job(*row) for row in rows])
+
+        t0 = time.perf_counter()
+        [dict(zip(DB_COLUMNS, row)) for row in rows]
+        t1 = time.perf_counter()
+        [Job(*row) for row in rows]
+        t2 = time.perf_counter()
+
+        print(
+            f"{n:>7} jobs: dict {as_dicts / n:6.0f} B/job ({as_dicts / 2**20:6.1f} MB, {t1 - t0:6.3f} s) | "
+            f"Job {as_jobs / n:6.0f} B/job ({as_jobs / 2**20:6.1f} MB, {t2 - t1:6.3f} s) | "
+            f"{as_dicts / as_jobs:4.1f}x smaller"
+        )
+
+
+# Result page fixtures and the card layout each one uses
+_PARSE_FIXTURES = {
+    "fixtures/indeed_search.html": "search",
+    "fixtures/indeed_link_cards.html": "link",
+}
+
+
+def bench_parse(args):
+    """
+    Indeed result page parse throughput: full BeautifulSoup tree (the old
+    path) vs. SoupStrainer partial parse vs. lxml with precompiled XPath.
+    """
+    import indeed_parser
+
+    paths = {
+        "soup full": lambda html, layout: indeed_parser._parse_soup(html, layout, strained=False),
+        "soup strained": indeed_parser._parse_soup,
+    }
+    if indeed_parser.etree is not None:
+        paths["lxml xpath"] = indeed_parser._parse_lxml
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    for fixture, layout in _PARSE_FIXTURES.items():
+        with open(os.path.join(root, fixture), encoding="utf-8") as f:
+            html = f.read()
+        print(f"{fixture} ({len(html) / 1024:.0f} KB, layout {layout}):")
+        reference = None
+        baseline = None
+        for name, parse in paths.items():
+            jobs = parse(html, layout)
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                parse(html, layout)
+            elapsed = (time.perf_counter() - t0) / args.repeat
+            baseline = baseline or elapsed
+            reference = reference if reference is not None else jobs
+            print(
+                f"  {name:13}: {elapsed * 1000:7.2f} ms/page | {1 / elapsed:7.1f} pages/s | "
+                f"{len(jobs)} cards | {baseline / elapsed:4.1f}x | "
+                f"{'same jobs' if jobs == reference else 'DIFFERENT JOBS'}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job bot benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    startup = sub.add_parser("startup", help="import cost of huggingface_ranker vs. warmup()")
+    startup.add_argument("--repeat", type=int, default=3)
+    startup.set_defaults(func=bench_startup)
+
+    ranker = sub.add_parser("ranker", help="inference throughput and RSS per backend")
+    ranker.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    ranker.add_argument("--jobs", type=int, default=512)
+    ranker.set_defaults(func=bench_ranker)
+
+    parity = sub.add_parser("parity", help="score tolerance of a backend vs. fp32 torch")
+    parity.add_argument("--backend", default="onnx")
+    parity.set_defaults(func=bench_parity)
+
+    db_write = sub.add_parser("db-write", help="bulk save_jobs vs. per-row add_job")
+    db_write.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    db_write.set_defaults(func=bench_db_write)
+
+    memory = sub.add_parser("memory", help="memory per job: row dicts vs. Job records")
+    memory.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    memory.set_defaults(func=bench_memory)
+
+    parse = sub.add_parser("parse", help="Indeed page parsing: BeautifulSoup vs. strained vs. lxml")
+    parse.add_argument("--repeat", type=int, default=20)
+    parse.set_defaults(func=bench_parse)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
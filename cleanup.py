@@ -1,47 +1,154 @@
 import os
+import gzip
+import json
+import asyncio
 import logging
+from typing import List, Dict, Optional, Tuple
 from db import DBHandler
-from config import LOG_DIR, MAX_LOG_AGE_DAYS, MAX_JOB_AGE_DAYS
+from job import Job
+from http_cache import HTTPCache
+from config import (
+    LOG_DIR,
+    MAX_LOG_AGE_DAYS,
+    MAX_JOB_AGE_DAYS,
+    HTTP_CACHE_MAX_AGE_DAYS,
+    CLEANUP_BATCH_SIZE,
+    ARCHIVE_OLD_JOBS,
+    ARCHIVE_DIR,
+    DB_VACUUM_PAGES,
+)
 from datetime import datetime, timedelta
 
 logger = logging.getLogger("jobbot.cleanup")
 db = DBHandler()
+http_cache = HTTPCache()
 
-def cleanup_old_jobs():
-    """Delete jobs that have been accepted or declined older than MAX_JOB_AGE_DAYS."""
-    cutoff_date = datetime.utcnow() - timedelta(days=MAX_JOB_AGE_DAYS)
-    deleted_count = db.delete_old_jobs(cutoff_date)
+def _cutoff_timestamp(days: int) -> int:
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    return int((cutoff_date - datetime(1970, 1, 1)).total_seconds())
+
+class JobArchive:
+    """Gzipped JSON-lines file that deleted jobs are appended to, one file per cleanup run."""
+
+    def __init__(self, archive_dir: str = ARCHIVE_DIR):
+        self.path = os.path.join(archive_dir, f"jobs-{datetime.utcnow():%Y%m%d-%H%M%S}.jsonl.gz")
+        self._file = None
+        self.count = 0
+
+    def write(self, jobs: List[Job]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+        for job in jobs:
+            self._file.write(json.dumps(job.to_dict(), ensure_ascii=False) + "\n")
+        # Flush per batch: the batch's rows are deleted as soon as this returns
+        self._file.flush()
+        self.count += len(jobs)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def cleanup_old_jobs() -> int:
+    """Delete (and archive) jobs that have been accepted or declined older than MAX_JOB_AGE_DAYS."""
+    archive = JobArchive() if ARCHIVE_OLD_JOBS else None
+    try:
+        deleted_count = db.delete_old_jobs(
+            _cutoff_timestamp(MAX_JOB_AGE_DAYS),
+            batch_size=CLEANUP_BATCH_SIZE,
+            archive=archive.write if archive else None,
+        )
+    finally:
+        if archive:
+            archive.close()
+    if archive and archive.count:
+        logger.info(f"Archived {archive.count} jobs to {archive.path}.")
     logger.info(f"Deleted {deleted_count} old accepted/declined jobs.")
+    return deleted_count
 
-def cleanup_old_logs():
-    """Remove log files older than MAX_LOG_AGE_DAYS."""
-    cutoff_date = datetime.utcnow() - timedelta(days=MAX_LOG_AGE_DAYS)
+def cleanup_model_caches() -> int:
+    """Evict cached embeddings, company ratings, seen job ids and delivered outbox rows older than MAX_JOB_AGE_DAYS."""
+    cutoff_timestamp = _cutoff_timestamp(MAX_JOB_AGE_DAYS)
+    total = 0
+    deleted_count = db.delete_stale_embeddings(cutoff_timestamp)
+    logger.info(f"Evicted {deleted_count} stale job embeddings.")
+    total += deleted_count
+    deleted_count = db.delete_stale_company_ratings(cutoff_timestamp)
+    logger.info(f"Evicted {deleted_count} stale company ratings.")
+    total += deleted_count
+    deleted_count = db.delete_old_seen_jobs(cutoff_timestamp)
+    logger.info(f"Forgot {deleted_count} old seen job ids.")
+    total += deleted_count
+    deleted_count = db.delete_old_deliveries(cutoff_timestamp)
+    logger.info(f"Removed {deleted_count} finished delivery records.")
+    total += deleted_count
+    return total
+
+def cleanup_old_logs() -> Tuple[int, int]:
+    """Remove log files older than MAX_LOG_AGE_DAYS. Returns (files deleted, bytes freed)."""
+    cutoff = _cutoff_timestamp(MAX_LOG_AGE_DAYS)
     if not os.path.exists(LOG_DIR):
         logger.warning(f"Log directory {LOG_DIR} does not exist, skipping log cleanup.")
-        return
+        return 0, 0
 
     deleted_files = 0
-    for filename in os.listdir(LOG_DIR):
-        file_path = os.path.join(LOG_DIR, filename)
-        if os.path.isfile(file_path):
-            file_mtime = datetime.utcfromtimestamp(os.path.getmtime(file_path))
-            if file_mtime < cutoff_date:
-                try:
-                    os.remove(file_path)
-                    deleted_files += 1
-                    logger.info(f"Deleted old log file: {file_path}")
-                except Exception as e:
-                    logger.error(f"Error deleting log file {file_path}: {e}")
-    logger.info(f"Deleted {deleted_files} old log files.")
-
-def cleanup_temp_files():
-    """Placeholder for any temporary files cleanup if applicable."""
-    # Implement if your bot generates temp files or caches that need clearing
-    pass
-
-def run_cleanup():
+    freed_bytes = 0
+    # scandir hands back the stat data with each entry instead of one stat call per check
+    with os.scandir(LOG_DIR) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if stat.st_mtime >= cutoff:
+                    continue
+                os.remove(entry.path)
+                deleted_files += 1
+                freed_bytes += stat.st_size
+                logger.info(f"Deleted old log file: {entry.path}")
+            except OSError as e:
+                logger.error(f"Error deleting log file {entry.path}: {e}")
+    logger.info(f"Deleted {deleted_files} old log files ({freed_bytes} bytes).")
+    return deleted_files, freed_bytes
+
+def cleanup_temp_files() -> int:
+    """Prune scraper HTTP cache entries not revalidated within HTTP_CACHE_MAX_AGE_DAYS."""
+    removed = http_cache.prune(HTTP_CACHE_MAX_AGE_DAYS * 86400)
+    logger.info(f"Pruned {removed} stale HTTP cache entries.")
+    return removed
+
+def compact_database() -> int:
+    """Return up to DB_VACUUM_PAGES free pages to the filesystem and refresh planner statistics."""
+    reclaimed = db.vacuum_incremental(DB_VACUUM_PAGES)
+    db.optimize()
+    storage = db.get_storage_stats()
+    logger.info(
+        f"Database compacted by {reclaimed} bytes; now {storage['size_bytes']} bytes "
+        f"with {storage['free_bytes']} bytes still free."
+    )
+    return reclaimed
+
+def run_cleanup() -> Dict[str, int]:
+    """Run every cleanup step and return what was freed."""
     logger.info("Starting cleanup routine.")
-    cleanup_old_jobs()
-    cleanup_old_logs()
-    cleanup_temp_files()
-    logger.info("Cleanup routine finished.")
+    report = {
+        "jobs_deleted": cleanup_old_jobs(),
+        "cache_rows_deleted": cleanup_model_caches(),
+    }
+    report["log_files_deleted"], log_bytes = cleanup_old_logs()
+    report["http_cache_entries_pruned"] = cleanup_temp_files()
+    report["bytes_reclaimed"] = compact_database() + log_bytes
+    logger.info(
+        f"Cleanup routine finished: {report['jobs_deleted'] + report['cache_rows_deleted']} rows freed, "
+        f"{report['bytes_reclaimed']} bytes reclaimed."
+    )
+    return report
+
+async def run_cleanup_async() -> Optional[Dict[str, int]]:
+    """Run the cleanup routine on a worker thread so the event loop keeps serving updates."""
+    try:
+        return await asyncio.to_thread(run_cleanup)
+    except Exception as e:
+        logger.error(f"Cleanup routine failed: {e}")
+        return None
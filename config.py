@@ -10,6 +10,16 @@ except (ValueError, TypeError):
 
 PART_TIME_ONLY = os.getenv("JOB_PART_TIME_ONLY", "true").strip().lower() == "true"
 
+# Towns within RADIUS_MILES of TOWN, used to reject out-of-area postings before ranking
+NEARBY_TOWNS = [
+    t.strip()
+    for t in os.getenv("JOB_NEARBY_TOWNS", "Atherton,Tyldesley,Lowton,Golborne,Astley,Hindley,Culcheth,Wigan").split(",")
+    if t.strip()
+]
+
+# Comma-separated title keywords that disqualify a posting (e.g. "senior,manager")
+TITLE_BLOCKLIST = [t.strip().lower() for t in os.getenv("JOB_TITLE_BLOCKLIST", "").split(",") if t.strip()]
+
 # Scrape limits and scheduling
 try:
     LINKEDIN_DAILY_LIMIT = int(os.getenv("LINKEDIN_DAILY_LIMIT", "25"))
@@ -21,10 +31,95 @@ try:
 except (ValueError, TypeError):
     INDEED_DAILY_LIMIT = 25
 
+# Shared HTTP layer: retries with exponential backoff (seconds) and per-host concurrency
+try:
+    HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+except (ValueError, TypeError):
+    HTTP_MAX_RETRIES = 3
+
+try:
+    HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "1.0"))
+except (ValueError, TypeError):
+    HTTP_BACKOFF_BASE = 1.0
+
+try:
+    HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "60"))
+except (ValueError, TypeError):
+    HTTP_BACKOFF_MAX = 60.0
+
+try:
+    HTTP_PER_HOST_LIMIT = max(1, int(os.getenv("HTTP_PER_HOST_LIMIT", "4")))
+except (ValueError, TypeError):
+    HTTP_PER_HOST_LIMIT = 4
+
+# On-disk HTTP cache for scraper GETs; a URL fetched within the refetch interval is served from disk
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").strip().lower() == "true"
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "./cache/http").strip()
+
+try:
+    HTTP_CACHE_MIN_REFETCH_SECONDS = float(os.getenv("HTTP_CACHE_MIN_REFETCH_SECONDS", "900"))
+except (ValueError, TypeError):
+    HTTP_CACHE_MIN_REFETCH_SECONDS = 900.0
+
+try:
+    HTTP_CACHE_MAX_AGE_DAYS = int(os.getenv("HTTP_CACHE_MAX_AGE_DAYS", "2"))
+except (ValueError, TypeError):
+    HTTP_CACHE_MAX_AGE_DAYS = 2
+
+# Stop paginating once this fraction of a results page is already known from earlier runs
+try:
+    SCRAPE_KNOWN_STOP_RATIO = float(os.getenv("SCRAPE_KNOWN_STOP_RATIO", "0.8"))
+except (ValueError, TypeError):
+    SCRAPE_KNOWN_STOP_RATIO = 0.8
+
+# Postings whose normalized title+company+location shingles overlap at least this much are merged
+try:
+    DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+except (ValueError, TypeError):
+    DEDUP_SIMILARITY_THRESHOLD = 0.8
+
+# Indeed scraper politeness: concurrent result pages and delay (seconds) after each request
+try:
+    INDEED_CONCURRENCY = max(1, int(os.getenv("INDEED_CONCURRENCY", "3")))
+except (ValueError, TypeError):
+    INDEED_CONCURRENCY = 3
+
+try:
+    INDEED_REQUEST_DELAY = float(os.getenv("INDEED_REQUEST_DELAY", "1.5"))
+except (ValueError, TypeError):
+    INDEED_REQUEST_DELAY = 1.5
+
 # Telegram Bot credentials
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "").strip()
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "").strip()
 
+# Outbound delivery: per-chat and global send rates (messages/second), jobs per digest message
+# (1 = one message per job) and attempts before an undeliverable message is given up on
+try:
+    TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1.0"))
+except (ValueError, TypeError):
+    TELEGRAM_CHAT_RATE = 1.0
+
+try:
+    TELEGRAM_CHAT_BURST = max(1, int(os.getenv("TELEGRAM_CHAT_BURST", "3")))
+except (ValueError, TypeError):
+    TELEGRAM_CHAT_BURST = 3
+
+try:
+    TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25.0"))
+except (ValueError, TypeError):
+    TELEGRAM_GLOBAL_RATE = 25.0
+
+try:
+    TELEGRAM_DIGEST_SIZE = max(1, int(os.getenv("TELEGRAM_DIGEST_SIZE", "1")))
+except (ValueError, TypeError):
+    TELEGRAM_DIGEST_SIZE = 1
+
+try:
+    TELEGRAM_MAX_SEND_ATTEMPTS = max(1, int(os.getenv("TELEGRAM_MAX_SEND_ATTEMPTS", "5")))
+except (ValueError, TypeError):
+    TELEGRAM_MAX_SEND_ATTEMPTS = 5
+
 # Hugging Face API for ranking/filtering
 HF_API_KEY = os.getenv("HF_API_KEY", "").strip()
 
@@ -46,6 +141,21 @@ try:
 except (ValueError, TypeError):
     MAX_LOG_AGE_DAYS = 30
 
+# Old jobs are deleted CLEANUP_BATCH_SIZE rows per transaction, archived first to
+# gzipped JSON lines in ARCHIVE_DIR; each cleanup returns up to DB_VACUUM_PAGES free pages to the OS
+try:
+    CLEANUP_BATCH_SIZE = max(1, int(os.getenv("CLEANUP_BATCH_SIZE", "500")))
+except (ValueError, TypeError):
+    CLEANUP_BATCH_SIZE = 500
+
+ARCHIVE_OLD_JOBS = os.getenv("ARCHIVE_OLD_JOBS", "true").strip().lower() == "true"
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive").strip()
+
+try:
+    DB_VACUUM_PAGES = max(0, int(os.getenv("DB_VACUUM_PAGES", "2000")))
+except (ValueError, TypeError):
+    DB_VACUUM_PAGES = 2000
+
 # Job scoring thresholds
 try:
     MIN_SALARY_ANNUAL = int(os.getenv("MIN_SALARY_ANNUAL", "17500"))
@@ -67,6 +177,49 @@ try:
 except (ValueError, TypeError):
     MIN_CV_MATCH_SCORE = 7.0
 
+try:
+    COMPANY_RATING_TTL_HOURS = float(os.getenv("COMPANY_RATING_TTL_HOURS", "24"))
+except (ValueError, TypeError):
+    COMPANY_RATING_TTL_HOURS = 24.0
+
+try:
+    SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+except (ValueError, TypeError):
+    SENTIMENT_BATCH_SIZE = 16
+
+# Ranker inference backend: "torch" (fp32 PyTorch) or "onnx" (ONNX Runtime, needs optimum[onnxruntime])
+RANKER_BACKEND = os.getenv("RANKER_BACKEND", "torch").strip().lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./models/onnx").strip()
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").strip().lower() == "true"
+
+try:
+    BACKEND_SCORE_TOLERANCE = float(os.getenv("BACKEND_SCORE_TOLERANCE", "0.03"))
+except (ValueError, TypeError):
+    BACKEND_SCORE_TOLERANCE = 0.03
+
+# Ranking runs in separate worker processes; each worker holds its own copy of the models
+try:
+    RANKER_WORKERS = max(1, int(os.getenv("RANKER_WORKERS", "1")))
+except (ValueError, TypeError):
+    RANKER_WORKERS = 1
+
+try:
+    RANK_CHUNK_SIZE = max(1, int(os.getenv("RANK_CHUNK_SIZE", "64")))
+except (ValueError, TypeError):
+    RANK_CHUNK_SIZE = 64
+
+# Streaming scrape -> rank -> store: result pages buffered between scrapers and the ranker,
+# and how long a partly filled ranking batch waits for more jobs before it is ranked anyway
+try:
+    STREAM_QUEUE_PAGES = max(1, int(os.getenv("STREAM_QUEUE_PAGES", "4")))
+except (ValueError, TypeError):
+    STREAM_QUEUE_PAGES = 4
+
+try:
+    STREAM_BATCH_WAIT_SECONDS = float(os.getenv("STREAM_BATCH_WAIT_SECONDS", "2.0"))
+except (ValueError, TypeError):
+    STREAM_BATCH_WAIT_SECONDS = 2.0
+
 # CV file path for ranking module (must exist)
 CV_PATH = os.getenv("CV_PATH", "/home/ubuntu/job-bot/cv.pdf").strip()
 
@@ -81,13 +234,21 @@ try:
 except (ValueError, TypeError):
     COMPANY_RATING_THRESHOLD = 6.0
 
+# Async DB access: reader threads (writes always go through a single writer thread)
+try:
+    DB_READ_THREADS = max(1, int(os.getenv("DB_READ_THREADS", "2")))
+except (ValueError, TypeError):
+    DB_READ_THREADS = 2
+
 # Misc
 try:
     MAX_JOB_DESCRIPTION_LENGTH = int(os.getenv("MAX_JOB_DESCRIPTION_LENGTH", "1000"))
 except (ValueError, TypeError):
     MAX_JOB_DESCRIPTION_LENGTH = 1000
 
-# Scheduler times (24h format) - fallback to list of strings if not set
+# Scheduler times (24h format, local time in SCHEDULE_TIMEZONE) - fallback to list of strings if not set
+SCHEDULE_TIMEZONE = os.getenv("SCHEDULE_TIMEZONE", "Europe/London").strip()
+
 SCRAPE_TIMES = [
     os.getenv("SCRAPE_TIME_1", "08:30").strip(),
     os.getenv("SCRAPE_TIME_2", "13:45").strip(),
@@ -1,9 +1,427 @@
+import re
+import sys
+import time
+import random
 import sqlite3
+import logging
 import threading
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Set, Callable
+from job import Job, DB_COLUMNS, UPSERT_COLUMNS, job_row_factory
+
+logger = logging.getLogger("jobbot.db")
 
 DB_PATH = "jobbot.db"
-_lock = threading.Lock()
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+_MAX_PARAMS = 500
+
+# Connection tuning: page cache per connection (KiB), memory-mapped I/O window and
+# how long a writer waits for another connection's write lock before failing
+_CACHE_SIZE_KIB = 16 * 1024
+_MMAP_SIZE = 128 * 1024 * 1024
+_BUSY_TIMEOUT_SECONDS = 30
+# Per-connection cache of prepared statements, keyed by SQL text
+_CACHED_STATEMENTS = 256
+
+# One long-lived connection per (thread, database path), shared by all DBHandler instances
+_local = threading.local()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        db_path,
+        timeout=_BUSY_TIMEOUT_SECONDS,
+        check_same_thread=False,
+        cached_statements=_CACHED_STATEMENTS,
+    )
+    # Only takes effect on a new, empty database; existing ones are converted once by DBHandler
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets readers proceed while a writer commits; NORMAL sync is durable across app crashes in WAL mode
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{_CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def close_connections():
+    """Close this thread's cached connections (e.g. before a worker thread exits)."""
+    connections = getattr(_local, "connections", {})
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
+
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Each entry is (version, description, steps); a step is an SQL string or a
+# callable taking the cursor. Never edit a released migration, append a new one.
+def _add_column(table: str, column: str, decl: str):
+    def step(cursor: sqlite3.Cursor):
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return step
+
+
+# BM25 column weights for search_jobs(): title, company, location, description
+_SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+_SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+# NEW.accepted is NULL for a new job, and value + NULL would wipe the counter, hence IFNULL
+_STATS_INSERT_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS trg_jobs_stats_insert AFTER INSERT ON jobs
+BEGIN
+    UPDATE stats SET value = value + CASE key
+        WHEN 'scraped_jobs' THEN 1
+        WHEN 'sent_jobs' THEN IFNULL(NEW.sent = 1, 0)
+        WHEN 'accepted_jobs' THEN IFNULL(NEW.accepted = 1, 0)
+        WHEN 'pending_jobs' THEN IFNULL(NEW.sent = 0 AND NEW.accepted IS NULL, 0)
+    END
+    WHERE key IN ('scraped_jobs', 'sent_jobs', 'accepted_jobs', 'pending_jobs');
+END
+"""
+
+
+_MIGRATIONS = [
+    (1, "baseline schema", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            title TEXT,
+            company TEXT,
+            location TEXT,
+            salary TEXT,
+            description TEXT,
+            url TEXT,
+            company_rating REAL,
+            company_rating_summary TEXT,
+            cv_match_score REAL,
+            sent BOOLEAN DEFAULT 0,
+            accepted BOOLEAN DEFAULT NULL,
+            timestamp INTEGER
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_actions (
+            job_id TEXT PRIMARY KEY,
+            accepted BOOLEAN NOT NULL,
+            action_timestamp INTEGER NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS job_embeddings (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            created_at INTEGER NOT NULL,
+            last_used INTEGER NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS company_ratings (
+            company TEXT PRIMARY KEY,
+            rating REAL NOT NULL,
+            summary TEXT,
+            review_count INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS seen_jobs (
+            id TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            first_seen INTEGER NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS scrape_state (
+            source TEXT PRIMARY KEY,
+            newest_job_id TEXT,
+            newest_posted_at INTEGER,
+            updated_at INTEGER NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stats (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        );
+        """,
+    ]),
+    (2, "ranker output columns on jobs", [
+        _add_column("jobs", "semantic_score", "REAL"),
+        _add_column("jobs", "company_summary", "TEXT"),
+        "UPDATE jobs SET company_summary = company_rating_summary WHERE company_summary IS NULL",
+    ]),
+    (3, "indexes for hot queries", [
+        # get_jobs_to_send: partial index matching its WHERE clause, ordered like its ORDER BY
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_pending_score
+        ON jobs(cv_match_score DESC) WHERE sent=0 AND accepted IS NULL
+        """,
+        # Age-based cleanup
+        "CREATE INDEX IF NOT EXISTS idx_jobs_timestamp ON jobs(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_source ON jobs(source)",
+        "CREATE INDEX IF NOT EXISTS idx_seen_jobs_source ON seen_jobs(source)",
+        "CREATE INDEX IF NOT EXISTS idx_seen_jobs_first_seen ON seen_jobs(first_seen)",
+        "CREATE INDEX IF NOT EXISTS idx_job_embeddings_last_used ON job_embeddings(last_used)",
+        "CREATE INDEX IF NOT EXISTS idx_company_ratings_updated_at ON company_ratings(updated_at)",
+    ]),
+    (4, "stats counters maintained by triggers", [
+        # Lifetime totals (cleanup deleting old jobs doesn't lower them), except pending_jobs
+        # which is the current number of unsent, unanswered jobs
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_stats_insert AFTER INSERT ON jobs
+        BEGIN
+            UPDATE stats SET value = value + CASE key
+                WHEN 'scraped_jobs' THEN 1
+                WHEN 'sent_jobs' THEN NEW.sent = 1
+                WHEN 'accepted_jobs' THEN NEW.accepted = 1
+                WHEN 'pending_jobs' THEN NEW.sent = 0 AND NEW.accepted IS NULL
+            END
+            WHERE key IN ('scraped_jobs', 'sent_jobs', 'accepted_jobs', 'pending_jobs');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_stats_update AFTER UPDATE OF sent, accepted ON jobs
+        BEGIN
+            UPDATE stats SET value = value + CASE key
+                WHEN 'sent_jobs' THEN (NEW.sent = 1) - (OLD.sent = 1)
+                WHEN 'accepted_jobs' THEN IFNULL(NEW.accepted = 1, 0) - IFNULL(OLD.accepted = 1, 0)
+                WHEN 'pending_jobs' THEN (NEW.sent = 0 AND NEW.accepted IS NULL) - (OLD.sent = 0 AND OLD.accepted IS NULL)
+            END
+            WHERE key IN ('sent_jobs', 'accepted_jobs', 'pending_jobs');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_stats_delete AFTER DELETE ON jobs
+        WHEN OLD.sent = 0 AND OLD.accepted IS NULL
+        BEGIN
+            UPDATE stats SET value = value - 1 WHERE key = 'pending_jobs';
+        END
+        """,
+        # Backfill from the jobs already stored
+        """
+        INSERT OR REPLACE INTO stats (key, value)
+        SELECT 'scraped_jobs', COUNT(*) FROM jobs
+        UNION ALL SELECT 'sent_jobs', COUNT(*) FROM jobs WHERE sent = 1
+        UNION ALL SELECT 'accepted_jobs', COUNT(*) FROM jobs WHERE accepted = 1
+        UNION ALL SELECT 'pending_jobs', COUNT(*) FROM jobs WHERE sent = 0 AND accepted IS NULL
+        """,
+    ]),
+    (5, "pending job queue for random sampling, user id on actions", [
+        # Dense rowids over the pending jobs only, so a random rowid lands on a pending job
+        """
+        CREATE TABLE IF NOT EXISTS pending_queue (
+            seq INTEGER PRIMARY KEY,
+            job_id TEXT NOT NULL UNIQUE,
+            score REAL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_pending_queue_score ON pending_queue(score)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_pending_queue_insert AFTER INSERT ON jobs
+        WHEN NEW.sent = 0 AND NEW.accepted IS NULL
+        BEGIN
+            INSERT OR IGNORE INTO pending_queue (job_id, score) VALUES (NEW.id, NEW.cv_match_score);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_pending_queue_enter AFTER UPDATE OF sent, accepted, cv_match_score ON jobs
+        WHEN NEW.sent = 0 AND NEW.accepted IS NULL
+        BEGIN
+            INSERT INTO pending_queue (job_id, score) VALUES (NEW.id, NEW.cv_match_score)
+            ON CONFLICT(job_id) DO UPDATE SET score = excluded.score;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_pending_queue_leave AFTER UPDATE OF sent, accepted ON jobs
+        WHEN NOT (NEW.sent = 0 AND NEW.accepted IS NULL)
+        BEGIN
+            DELETE FROM pending_queue WHERE job_id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_pending_queue_delete AFTER DELETE ON jobs
+        BEGIN
+            DELETE FROM pending_queue WHERE job_id = OLD.id;
+        END
+        """,
+        """
+        INSERT OR IGNORE INTO pending_queue (job_id, score)
+        SELECT id, cv_match_score FROM jobs WHERE sent = 0 AND accepted IS NULL ORDER BY rowid
+        """,
+        _add_column("user_actions", "user_id", "INTEGER"),
+    ]),
+    (6, "full-text search over jobs", [
+        # External-content FTS5 index: stores only the index, text is read back from jobs by rowid.
+        # jobs has no INTEGER PRIMARY KEY, so a full VACUUM may renumber its rowids;
+        # call rebuild_search_index() after one.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+            title, company, location, description,
+            content='jobs', content_rowid='rowid',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_fts_insert AFTER INSERT ON jobs
+        BEGIN
+            INSERT INTO jobs_fts (rowid, title, company, location, description)
+            VALUES (NEW.rowid, NEW.title, NEW.company, NEW.location, NEW.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_fts_delete AFTER DELETE ON jobs
+        BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location, description)
+            VALUES ('delete', OLD.rowid, OLD.title, OLD.company, OLD.location, OLD.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_jobs_fts_update AFTER UPDATE OF title, company, location, description ON jobs
+        BEGIN
+            INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location, description)
+            VALUES ('delete', OLD.rowid, OLD.title, OLD.company, OLD.location, OLD.description);
+            INSERT INTO jobs_fts (rowid, title, company, location, description)
+            VALUES (NEW.rowid, NEW.title, NEW.company, NEW.location, NEW.description);
+        END
+        """,
+        # Make the hidden rank column BM25 with _SEARCH_WEIGHTS, so FTS5 can order by it itself
+        f"INSERT INTO jobs_fts (jobs_fts, rank) VALUES ('rank', 'bm25({', '.join(map(str, _SEARCH_WEIGHTS))})')",
+        "INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')",
+    ]),
+    (7, "repair stats insert trigger", [
+        # Version 4's trigger added NULL to accepted_jobs for every new job, leaving it NULL
+        "DROP TRIGGER IF EXISTS trg_jobs_stats_insert",
+        _STATS_INSERT_TRIGGER,
+        """
+        INSERT OR REPLACE INTO stats (key, value)
+        SELECT 'scraped_jobs', MAX(IFNULL((SELECT value FROM stats WHERE key = 'scraped_jobs'), 0), COUNT(*)) FROM jobs
+        UNION ALL SELECT 'sent_jobs', COUNT(*) FROM jobs WHERE sent = 1
+        UNION ALL SELECT 'accepted_jobs', COUNT(*) FROM jobs WHERE accepted = 1
+        UNION ALL SELECT 'pending_jobs', COUNT(*) FROM jobs WHERE sent = 0 AND accepted IS NULL
+        """,
+    ]),
+    (8, "telegram delivery outbox", [
+        # One row per (job, chat); survives restarts so queued jobs are neither dropped nor re-queued
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY,
+            job_id TEXT NOT NULL,
+            chat_id TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL,
+            UNIQUE (job_id, chat_id)
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox(chat_id, id) WHERE status = 'pending'",
+        "CREATE INDEX IF NOT EXISTS idx_outbox_updated_at ON outbox(updated_at) WHERE status != 'pending'",
+    ]),
+    (9, "canonical Job columns", [
+        # semantic_score and company_rating_summary are superseded by cv_match_score and company_summary
+        _add_column("jobs", "posted_at", "INTEGER"),
+        "UPDATE jobs SET cv_match_score = semantic_score WHERE cv_match_score IS NULL",
+        "UPDATE jobs SET company_summary = company_rating_summary WHERE company_summary IS NULL",
+    ]),
+]
+
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+# SELECT list that job_row_factory turns into Job records, bare and qualified for joins
+_JOB_COLUMNS = ", ".join(DB_COLUMNS)
+_JOBS_JOB_COLUMNS = ", ".join(f"jobs.{column}" for column in DB_COLUMNS)
+
+# Keys of the trigger-maintained counters in the stats table
+STAT_COUNTERS = ("scraped_jobs", "sent_jobs", "accepted_jobs", "pending_jobs")
+_STATS_KEYS = STAT_COUNTERS + ("bot_started_at",)
+
+# Statements on hot paths. The DBHandler methods execute these constants and
+# HOT_QUERIES plans the very same text, so an index regression can't hide.
+_JOB_BY_ID_SQL = f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id=?"
+_JOBS_TO_SEND_SQL = (
+    f"SELECT {_JOB_COLUMNS} FROM jobs WHERE sent=0 AND accepted IS NULL "
+    "AND NOT EXISTS (SELECT 1 FROM outbox WHERE outbox.job_id = jobs.id) ORDER BY cv_match_score DESC LIMIT ?"
+)
+_OLD_JOBS_SQL = (
+    f"SELECT {_JOB_COLUMNS}, rowid FROM jobs "
+    "WHERE timestamp < ? AND (timestamp, rowid) > (?, ?) AND accepted IS NOT NULL "
+    "ORDER BY timestamp, rowid LIMIT ?"
+)
+_PENDING_DELIVERIES_SQL = (
+    f"SELECT outbox.id, {_JOBS_JOB_COLUMNS} FROM outbox JOIN jobs ON jobs.id = outbox.job_id "
+    "WHERE outbox.chat_id = ? AND outbox.status = 'pending' ORDER BY outbox.id LIMIT ?"
+)
+_OLD_DELIVERIES_SQL = "DELETE FROM outbox WHERE status != 'pending' AND updated_at < ?"
+_SEEN_BY_SOURCE_SQL = "SELECT id FROM jobs WHERE source=? UNION SELECT id FROM seen_jobs WHERE source=?"
+_OLD_SEEN_JOBS_SQL = "DELETE FROM seen_jobs WHERE first_seen < ?"
+_STALE_EMBEDDINGS_SQL = "DELETE FROM job_embeddings WHERE last_used < ?"
+_STALE_COMPANY_RATINGS_SQL = "DELETE FROM company_ratings WHERE updated_at < ?"
+_PENDING_BOUNDS_SQL = (
+    "SELECT (SELECT MIN(seq) FROM pending_queue), (SELECT MAX(seq) FROM pending_queue), "
+    "(SELECT MAX(score) FROM pending_queue)"
+)
+_PENDING_PROBE_SQL = "SELECT job_id, score FROM pending_queue WHERE seq >= ? ORDER BY seq LIMIT 1"
+# {where} is filled in by search_jobs() from its filters
+_SEARCH_SQL = (
+    f"SELECT {_JOBS_JOB_COLUMNS} FROM jobs_fts CROSS JOIN jobs ON jobs.rowid = jobs_fts.rowid "
+    "WHERE {where} ORDER BY jobs_fts.rank LIMIT ?"
+)
+_STATS_SQL = f"SELECT key, value FROM stats WHERE key IN ({','.join('?' * len(_STATS_KEYS))})"
+
+# The hot statements and the parameters to plan them with; check_query_plans()
+# fails if any of them falls back to a full table scan or a temp-table sort.
+HOT_QUERIES = {
+    "jobs_to_send": (_JOBS_TO_SEND_SQL, (50,)),
+    "old_jobs": (_OLD_JOBS_SQL, (0, -1, 0, 500)),
+    "pending_deliveries": (_PENDING_DELIVERIES_SQL, ("0", 50)),
+    "old_deliveries": (_OLD_DELIVERIES_SQL, (0,)),
+    "seen_by_source": (_SEEN_BY_SOURCE_SQL, ("indeed", "indeed")),
+    "old_seen_jobs": (_OLD_SEEN_JOBS_SQL, (0,)),
+    "stale_embeddings": (_STALE_EMBEDDINGS_SQL, (0,)),
+    "stale_company_ratings": (_STALE_COMPANY_RATINGS_SQL, (0,)),
+    "pending_probe": (_PENDING_PROBE_SQL, (0,)),
+    "pending_bounds": (_PENDING_BOUNDS_SQL, ()),
+    "job_by_id": (_JOB_BY_ID_SQL, ("",)),
+    "search": (
+        _SEARCH_SQL.format(where="jobs_fts MATCH ? AND jobs.source = ?"),
+        ('"barista"', "indeed", 10),
+    ),
+    "stats": (_STATS_SQL, _STATS_KEYS),
+}
+
+# Random rowid probes get_random_pending_job() makes before falling back to a scan
+_SAMPLE_ATTEMPTS = 16
+
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every word must match (quoted, so
+    user input can't be parsed as FTS5 syntax) and the last word matches as a prefix.
+    """
+    terms = _SEARCH_TERM.findall(text or "")
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def format_uptime(started_at: Optional[int]) -> str:
+    """Human-readable time since started_at (epoch seconds), e.g. "2d 3h 14m"."""
+    if not started_at:
+        return "unknown"
+    minutes = max(0, int(time.time()) - started_at) // 60
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{days}d {hours}h {minutes}m" if days else f"{hours}h {minutes}m"
+
 
 class DBHandler:
     def __init__(self, db_path: str = DB_PATH):
@@ -11,115 +429,572 @@ class DBHandler:
         self._initialize_db()
 
     def _initialize_db(self):
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS jobs (
-                id TEXT PRIMARY KEY,
-                source TEXT NOT NULL,
-                title TEXT,
-                company TEXT,
-                location TEXT,
-                salary TEXT,
-                description TEXT,
-                url TEXT,
-                company_rating REAL,
-                company_rating_summary TEXT,
-                cv_match_score REAL,
-                sent BOOLEAN DEFAULT 0,
-                accepted BOOLEAN DEFAULT NULL,
-                timestamp INTEGER
-            );
-            """)
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_actions (
-                job_id TEXT PRIMARY KEY,
-                accepted BOOLEAN NOT NULL,
-                action_timestamp INTEGER NOT NULL
-            );
-            """)
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stats (
-                key TEXT PRIMARY KEY,
-                value INTEGER
-            );
-            """)
-            conn.commit()
+        self._migrate()
+        self._enable_incremental_vacuum()
+
+    def _enable_incremental_vacuum(self):
+        """One-off conversion of a database created before auto_vacuum=INCREMENTAL was set."""
+        conn = self._get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        logger.info("Converting database to incremental auto-vacuum (one-off VACUUM)...")
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        # VACUUM may renumber jobs rowids, which jobs_fts is keyed on
+        self.rebuild_search_index()
+
+    def _migrate(self):
+        """Bring the schema up to SCHEMA_VERSION, one transaction per migration."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        for version, description, steps in _MIGRATIONS:
+            if cursor.execute("PRAGMA user_version").fetchone()[0] >= version:
+                continue
+            # IMMEDIATE takes the write lock up front; re-check in case another process just migrated
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if cursor.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    conn.rollback()
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                cursor.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+                logger.info(f"Applied DB migration {version}: {description}")
+            except Exception:
+                conn.rollback()
+                raise
+
+    def explain_hot_queries(self) -> Dict[str, List[str]]:
+        """EXPLAIN QUERY PLAN detail lines for each of HOT_QUERIES."""
+        conn = self._get_connection()
+        return {
+            name: [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            for name, (sql, params) in HOT_QUERIES.items()
+        }
 
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+    def check_query_plans(self) -> Dict[str, List[str]]:
+        """
+        Return the hot queries whose plan scans a whole table or sorts in a temp
+        B-tree (i.e. an index they rely on is missing or unusable), with their plans.
+        """
+        offenders = {}
+        for name, plan in self.explain_hot_queries().items():
+            if any(re.match(r"SCAN \w+$", step) or "TEMP B-TREE FOR ORDER BY" in step for step in plan):
+                offenders[name] = plan
+        return offenders
 
-    def add_job(self, job_data: Dict[str, Any]) -> bool:
-        with _lock, self._get_connection() as conn:
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Return this thread's persistent connection to the database. Used as a
+        context manager it commits or rolls back, but never closes the connection.
+        """
+        connections = getattr(_local, "connections", None)
+        if connections is None:
+            connections = _local.connections = {}
+        conn = connections.get(self.db_path)
+        if conn is None:
+            conn = connections[self.db_path] = _connect(self.db_path)
+        return conn
+
+    def add_job(self, job: Job) -> bool:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("""
-                INSERT INTO jobs (id, source, title, company, location, salary, description, url, company_rating, company_rating_summary, cv_match_score, sent, accepted, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, NULL, strftime('%s','now'))
-                """, (
-                    job_data["id"],
-                    job_data["source"],
-                    job_data.get("title"),
-                    job_data.get("company"),
-                    job_data.get("location"),
-                    job_data.get("salary"),
-                    job_data.get("description"),
-                    job_data.get("url"),
-                    job_data.get("company_rating"),
-                    job_data.get("company_rating_summary"),
-                    job_data.get("cv_match_score"),
-                ))
+                cursor.execute(f"""
+                INSERT INTO jobs ({', '.join(UPSERT_COLUMNS)}, sent, accepted, timestamp)
+                VALUES ({', '.join('?' * len(UPSERT_COLUMNS))}, 0, NULL, strftime('%s','now'))
+                """, job.db_row())
                 conn.commit()
                 return True
             except sqlite3.IntegrityError:
                 # Duplicate job id
                 return False
 
+    def save_jobs(self, jobs: List[Job]) -> Dict[str, int]:
+        """
+        Upsert a batch of jobs in a single transaction.
+        New ids are inserted as unsent; existing ids get their scraped/ranked
+        fields refreshed while sent/accepted/timestamp are left alone.
+        Jobs without an id or source are skipped.
+        Returns {"inserted": n, "updated": n, "skipped": n}.
+        """
+        rows: Dict[str, tuple] = {}
+        skipped = 0
+        for job in jobs:
+            if not job.id or not job.source:
+                skipped += 1
+                continue
+            # Later duplicates within the batch win, like sequential upserts would
+            rows[job.id] = job.db_row()
+        if not rows:
+            return {"inserted": 0, "updated": 0, "skipped": skipped}
+
+        ids = list(rows)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            existing = set()
+            for i in range(0, len(ids), _MAX_PARAMS):
+                chunk = ids[i : i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT id FROM jobs WHERE id IN ({placeholders})", chunk)
+                existing.update(job_id for (job_id,) in cursor.fetchall())
+
+            cursor.executemany(f"""
+            INSERT INTO jobs ({', '.join(UPSERT_COLUMNS)}, sent, accepted, timestamp)
+            VALUES ({', '.join('?' * len(UPSERT_COLUMNS))}, 0, NULL, strftime('%s','now'))
+            ON CONFLICT(id) DO UPDATE SET
+                {', '.join(f"{column}=excluded.{column}" for column in UPSERT_COLUMNS[2:])}
+            """, rows.values())
+            conn.commit()
+
+        return {"inserted": len(ids) - len(existing), "updated": len(existing), "skipped": skipped}
+
     def mark_job_sent(self, job_id: str):
-        with _lock, self._get_connection() as conn:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("UPDATE jobs SET sent=1 WHERE id=?", (job_id,))
             conn.commit()
 
-    def mark_job_action(self, job_id: str, accepted: bool):
-        with _lock, self._get_connection() as conn:
+    def mark_job_action(self, job_id: str, accepted: bool, user_id: Optional[int] = None):
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-            INSERT OR REPLACE INTO user_actions (job_id, accepted, action_timestamp) VALUES (?, ?, strftime('%s','now'))
-            """, (job_id, accepted))
+            INSERT OR REPLACE INTO user_actions (job_id, accepted, action_timestamp, user_id) VALUES (?, ?, strftime('%s','now'), ?)
+            """, (job_id, accepted, user_id))
             cursor.execute("UPDATE jobs SET accepted=? WHERE id=?", (accepted, job_id))
             conn.commit()
 
-    def get_jobs_to_send(self, limit: int) -> List[Dict[str, Any]]:
-        with _lock, self._get_connection() as conn:
+    def mark_job_accepted(self, job_id: str, user_id: Optional[int] = None):
+        self.mark_job_action(job_id, True, user_id)
+
+    def mark_job_declined(self, job_id: str, user_id: Optional[int] = None):
+        self.mark_job_action(job_id, False, user_id)
+
+    def get_job_by_id(self, job_id: str) -> Optional[Job]:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-            SELECT id, source, title, company, location, salary, description, url, company_rating, company_rating_summary, cv_match_score
-            FROM jobs WHERE sent=0 AND accepted IS NULL
-            ORDER BY cv_match_score DESC
-            LIMIT ?
-            """, (limit,))
-            rows = cursor.fetchall()
-            return [self._row_to_dict(row) for row in rows]
+            cursor.row_factory = job_row_factory
+            cursor.execute(_JOB_BY_ID_SQL, (job_id,))
+            return cursor.fetchone()
+
+    def get_random_pending_job(
+        self, exclude: Optional[Set[str]] = None, weighted: bool = True
+    ) -> Optional[Job]:
+        """
+        Pick a random pending job, skipping ids in `exclude`.
+
+        Probes a random rowid of pending_queue (an O(log n) lookup) instead of
+        sorting the pending set. With `weighted`, a probe is kept with
+        probability cv_match_score / max score (rejection sampling), so better
+        matches come up more often. The pick is not uniform: a row after a
+        large rowid gap (left by jobs leaving the queue) is picked
+        proportionally more often.
+        """
+        with self._get_connection() as conn:
+            # One read transaction, so the probes see the same queue as the bounds
+            # query even if a writer empties or trims it in between
+            began = not conn.in_transaction
+            if began:
+                conn.execute("BEGIN")
+            try:
+                job_id = self._pick_pending_job_id(conn.cursor(), exclude or set(), weighted)
+                if job_id is None:
+                    return None
+                cursor = conn.cursor()
+                cursor.row_factory = job_row_factory
+                cursor.execute(_JOB_BY_ID_SQL, (job_id,))
+                return cursor.fetchone()
+            finally:
+                if began:
+                    conn.commit()
+
+    def _pick_pending_job_id(self, cursor: sqlite3.Cursor, exclude: Set[str], weighted: bool) -> Optional[str]:
+        cursor.execute(_PENDING_BOUNDS_SQL)
+        low, high, max_score = cursor.fetchone()
+        if low is None:
+            return None
+        weighted = weighted and max_score is not None and max_score > 0
+
+        fallback = None
+        for _ in range(_SAMPLE_ATTEMPTS):
+            cursor.execute(_PENDING_PROBE_SQL, (random.randint(low, high),))
+            job_id, score = cursor.fetchone()
+            if job_id in exclude:
+                continue
+            if not weighted or random.random() * max_score <= max(score or 0.0, 0.0):
+                return job_id
+            fallback = fallback or job_id
+        if fallback is not None:
+            return fallback
+
+        # Mostly excluded: walk the queue from a random point, wrapping around once
+        start = random.randint(low, high)
+        for sql in (
+            "SELECT job_id FROM pending_queue WHERE seq >= ? ORDER BY seq",
+            "SELECT job_id FROM pending_queue WHERE seq < ? ORDER BY seq",
+        ):
+            for (job_id,) in cursor.execute(sql, (start,)):
+                if job_id not in exclude:
+                    return job_id
+        return None
+
+    def get_jobs_to_send(self, limit: int) -> List[Job]:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = job_row_factory
+            cursor.execute(_JOBS_TO_SEND_SQL, (limit,))
+            return cursor.fetchall()
+
+    def search_jobs(
+        self, query: str, filters: Optional[Dict[str, Any]] = None, limit: int = 10
+    ) -> List[Job]:
+        """
+        Full-text search over title, company, location and description, best
+        BM25 match first. Supported filters: source, min_score (cv_match_score),
+        pending (unsent and unanswered), accepted (True/False) and since (epoch
+        seconds the job was stored at or after).
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        filters = filters or {}
+        where = ["jobs_fts MATCH ?"]
+        params: List[Any] = [match]
+        if filters.get("source"):
+            where.append("jobs.source = ?")
+            params.append(filters["source"])
+        if filters.get("min_score") is not None:
+            where.append("jobs.cv_match_score >= ?")
+            params.append(filters["min_score"])
+        if filters.get("pending"):
+            where.append("jobs.sent = 0 AND jobs.accepted IS NULL")
+        if filters.get("accepted") is not None:
+            where.append("jobs.accepted = ?")
+            params.append(bool(filters["accepted"]))
+        if filters.get("since") is not None:
+            where.append("jobs.timestamp >= ?")
+            params.append(filters["since"])
+        # CROSS JOIN keeps jobs_fts as the outer loop, so FTS5 returns matches already in rank order
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = job_row_factory
+            cursor.execute(_SEARCH_SQL.format(where=" AND ".join(where)), (*params, limit))
+            return cursor.fetchall()
+
+    def rebuild_search_index(self):
+        """Rebuild jobs_fts from jobs (needed after a full VACUUM renumbers rowids)."""
+        with self._get_connection() as conn:
+            conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+            conn.commit()
 
     def get_job_count(self) -> int:
-        with _lock, self._get_connection() as conn:
+        with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM jobs")
             (count,) = cursor.fetchone()
             return count
 
-    def _row_to_dict(self, row):
-        return {
-            "id": row[0],
-            "source": row[1],
-            "title": row[2],
-            "company": row[3],
-            "location": row[4],
-            "salary": row[5],
-            "description": row[6],
-            "url": row[7],
-            "company_rating": row[8],
-            "company_rating_summary": row[9],
-            "cv_match_score": row[10],
-        }
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Counters kept by the jobs triggers plus bot_started_at, in one indexed read.
+        Missing counters read as 0; bot_started_at is None until record_bot_start().
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_STATS_SQL, _STATS_KEYS)
+            stats = dict(cursor.fetchall())
+        for key in STAT_COUNTERS:
+            stats[key] = stats.get(key) or 0
+        stats.setdefault("bot_started_at", None)
+        return stats
+
+    def get_stat(self, key: str) -> Optional[int]:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM stats WHERE key=?", (key,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def count_scraped_jobs(self) -> int:
+        return self.get_stat("scraped_jobs") or 0
+
+    def count_sent_jobs(self) -> int:
+        return self.get_stat("sent_jobs") or 0
+
+    def count_accepted_jobs(self) -> int:
+        return self.get_stat("accepted_jobs") or 0
+
+    def count_pending_jobs(self) -> int:
+        return self.get_stat("pending_jobs") or 0
+
+    def set_stat(self, key: str, value: int):
+        with self._get_connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)", (key, value))
+            conn.commit()
+
+    def record_bot_start(self):
+        with self._get_connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO stats (key, value) VALUES ('bot_started_at', ?)", (int(time.time()),))
+            conn.commit()
+
+    def get_bot_uptime(self) -> str:
+        return format_uptime(self.get_stat("bot_started_at"))
+
+    def get_existing_job_ids(self, job_ids: List[str]) -> Set[str]:
+        """Return the subset of job_ids already stored or already seen by a previous scrape run."""
+        existing: Set[str] = set()
+        if not job_ids:
+            return existing
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(job_ids), _MAX_PARAMS):
+                chunk = job_ids[i : i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"""
+                SELECT id FROM jobs WHERE id IN ({placeholders})
+                UNION SELECT id FROM seen_jobs WHERE id IN ({placeholders})
+                """, chunk + chunk)
+                existing.update(job_id for (job_id,) in cursor.fetchall())
+        return existing
+
+    def get_seen_job_ids(self, source: str) -> Set[str]:
+        """All job ids from `source` that have been scraped before."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SEEN_BY_SOURCE_SQL, (source, source))
+            return {job_id for (job_id,) in cursor.fetchall()}
+
+    def mark_jobs_seen(self, jobs: List[Job]):
+        """Remember scraped job ids so later runs can stop paginating early."""
+        rows = [(job.id, job.source) for job in jobs if job.id and job.source]
+        if not rows:
+            return
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+            INSERT OR IGNORE INTO seen_jobs (id, source, first_seen) VALUES (?, ?, strftime('%s','now'))
+            """, rows)
+            conn.commit()
+
+    def delete_old_seen_jobs(self, cutoff_timestamp: int) -> int:
+        """Forget seen job ids first scraped before cutoff_timestamp (unix seconds)."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_OLD_SEEN_JOBS_SQL, (cutoff_timestamp,))
+            conn.commit()
+            return cursor.rowcount
+
+    def get_high_water_mark(self, source: str) -> Optional[Dict[str, Any]]:
+        """Newest posting seen for `source` as {"job_id", "posted_at"}, or None."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT newest_job_id, newest_posted_at FROM scrape_state WHERE source=?", (source,))
+            row = cursor.fetchone()
+            return {"job_id": row[0], "posted_at": row[1]} if row else None
+
+    def set_high_water_mark(self, source: str, job_id: Optional[str], posted_at: Optional[int]):
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+            INSERT OR REPLACE INTO scrape_state (source, newest_job_id, newest_posted_at, updated_at)
+            VALUES (?, ?, ?, strftime('%s','now'))
+            """, (source, job_id, posted_at))
+            conn.commit()
+
+    def get_embeddings(self, keys: List[str]) -> Dict[str, bytes]:
+        """Return cached embedding vectors by content key and refresh their last_used time."""
+        found: Dict[str, bytes] = {}
+        if not keys:
+            return found
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(keys), _MAX_PARAMS):
+                chunk = keys[i : i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT key, vector FROM job_embeddings WHERE key IN ({placeholders})", chunk)
+                found.update(cursor.fetchall())
+                cursor.execute(
+                    f"UPDATE job_embeddings SET last_used=strftime('%s','now') WHERE key IN ({placeholders})", chunk
+                )
+            conn.commit()
+        return found
+
+    def save_embeddings(self, model: str, dim: int, vectors: Dict[str, bytes]):
+        """Store embedding vectors keyed by content hash."""
+        if not vectors:
+            return
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+            INSERT OR REPLACE INTO job_embeddings (key, model, dim, vector, created_at, last_used)
+            VALUES (?, ?, ?, ?, strftime('%s','now'), strftime('%s','now'))
+            """, [(key, model, dim, vector) for key, vector in vectors.items()])
+            conn.commit()
+
+    def delete_stale_embeddings(self, cutoff_timestamp: int) -> int:
+        """Evict embeddings not used since cutoff_timestamp (unix seconds)."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_STALE_EMBEDDINGS_SQL, (cutoff_timestamp,))
+            conn.commit()
+            return cursor.rowcount
+
+    def get_company_ratings(self, companies: List[str], max_age_seconds: int) -> Dict[str, Tuple[float, str]]:
+        """Return cached (rating, summary) per company, ignoring entries older than max_age_seconds."""
+        found: Dict[str, Tuple[float, str]] = {}
+        if not companies:
+            return found
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(companies), _MAX_PARAMS):
+                chunk = companies[i : i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"""
+                SELECT company, rating, summary FROM company_ratings
+                WHERE company IN ({placeholders}) AND updated_at >= strftime('%s','now') - ?
+                """, (*chunk, max_age_seconds))
+                found.update((company, (rating, summary)) for company, rating, summary in cursor.fetchall())
+        return found
+
+    def save_company_ratings(self, ratings: Dict[str, Tuple[float, str, int]]):
+        """Store (rating, summary, review_count) per company."""
+        if not ratings:
+            return
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+            INSERT OR REPLACE INTO company_ratings (company, rating, summary, review_count, updated_at)
+            VALUES (?, ?, ?, ?, strftime('%s','now'))
+            """, [(company, rating, summary, count) for company, (rating, summary, count) in ratings.items()])
+            conn.commit()
+
+    def delete_stale_company_ratings(self, cutoff_timestamp: int) -> int:
+        """Drop company ratings last refreshed before cutoff_timestamp (unix seconds)."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_STALE_COMPANY_RATINGS_SQL, (cutoff_timestamp,))
+            conn.commit()
+            return cursor.rowcount
+
+    def delete_old_jobs(
+        self,
+        cutoff_timestamp: int,
+        batch_size: int = _MAX_PARAMS,
+        archive: Optional[Callable[[List[Job]], None]] = None,
+    ) -> int:
+        """
+        Delete accepted/declined jobs stored before cutoff_timestamp (unix seconds),
+        batch_size rows per transaction so writers elsewhere are never blocked for
+        long. Each batch is passed to `archive` before it is deleted; if archiving raises, nothing more is deleted.
+        Returns the number of jobs deleted.
+        """
+        deleted = 0
+        # Keyset pagination along idx_jobs_timestamp, so still-pending old rows are read once, not per batch
+        after = (-1, 0)
+        conn = self._get_connection()
+        while True:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute(_OLD_JOBS_SQL, (cutoff_timestamp, *after, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                if archive is not None:
+                    archive([Job(*row[:-1]) for row in rows])
+                rowids = [row[-1] for row in rows]
+                cursor.execute(f"DELETE FROM jobs WHERE rowid IN ({','.join('?' * len(rowids))})", rowids)
+                deleted += cursor.rowcount
+            after = (rows[-1][-2], rows[-1][-1])
+            if len(rows) < batch_size:
+                break
+        return deleted
+
+    def get_storage_stats(self) -> Dict[str, int]:
+        """Database file size and free (reclaimable) space in bytes."""
+        conn = self._get_connection()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return {"size_bytes": page_size * page_count, "free_bytes": page_size * free_pages}
+
+    def vacuum_incremental(self, max_pages: int = 0) -> int:
+        """
+        Return up to max_pages free pages (0 = all of them) to the filesystem.
+        Returns the number of bytes the database file shrank by.
+        """
+        before = self.get_storage_stats()["size_bytes"]
+        # executescript steps the pragma to completion; execute() would free a single page
+        self._get_connection().executescript(f"PRAGMA incremental_vacuum({max_pages});")
+        return before - self.get_storage_stats()["size_bytes"]
+
+    def optimize(self):
+        """Let SQLite refresh planner statistics where they are stale."""
+        self._get_connection().execute("PRAGMA optimize")
+
+    def add_deliveries(self, chat_id: str, job_ids: List[str]) -> int:
+        """Queue jobs for delivery to chat_id; jobs already queued for it are left alone."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            now = int(time.time())
+            cursor.executemany("""
+            INSERT OR IGNORE INTO outbox (job_id, chat_id, created_at, updated_at) VALUES (?, ?, ?, ?)
+            """, [(job_id, str(chat_id), now, now) for job_id in job_ids])
+            conn.commit()
+            return cursor.rowcount
+
+    def get_pending_deliveries(self, chat_id: str, limit: int) -> List[Tuple[int, Job]]:
+        """Undelivered jobs for chat_id as (outbox id, job), oldest queued first."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_PENDING_DELIVERIES_SQL, (str(chat_id), limit))
+            return [(row[0], Job(*row[1:])) for row in cursor.fetchall()]
+
+    def mark_deliveries_sent(self, outbox_ids: List[int]):
+        """Record a delivered message: its outbox rows and their jobs become sent together."""
+        placeholders = ",".join("?" * len(outbox_ids))
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE outbox SET status='sent', updated_at=strftime('%s','now') WHERE id IN ({placeholders})",
+                outbox_ids,
+            )
+            cursor.execute(
+                f"UPDATE jobs SET sent=1 WHERE id IN (SELECT job_id FROM outbox WHERE id IN ({placeholders}))",
+                outbox_ids,
+            )
+            conn.commit()
+
+    def mark_deliveries_failed(self, outbox_ids: List[int], max_attempts: int, permanent: bool = False):
+        """Count a failed attempt; rows reaching max_attempts (or permanent failures) stop being retried."""
+        placeholders = ",".join("?" * len(outbox_ids))
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+            UPDATE outbox SET
+                attempts = attempts + 1,
+                status = CASE WHEN ? OR attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+                updated_at = strftime('%s','now')
+            WHERE id IN ({placeholders})
+            """, (permanent, max_attempts, *outbox_ids))
+            conn.commit()
+
+    def delete_old_deliveries(self, cutoff_timestamp: int) -> int:
+        """Drop sent/failed outbox rows last updated before cutoff_timestamp (unix seconds)."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_OLD_DELIVERIES_SQL, (cutoff_timestamp,))
+            conn.commit()
+            return cursor.rowcount
+
+
+if __name__ == "__main__":
+    # Query-plan regression check: python db.py [db_path]
+    handler = DBHandler(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    bad_plans = handler.check_query_plans()
+    for query_name, query_plan in handler.explain_hot_queries().items():
+        print(f"{'FAIL' if query_name in bad_plans else 'ok  '} {query_name}: {' | '.join(query_plan)}")
+    sys.exit(1 if bad_plans else 0)
@@ -0,0 +1,189 @@
+"""
+Outbound Telegram delivery queue.
+
+Jobs to send are first written to the outbox table, then drained in queue
+order under a token-bucket rate limit per chat plus a global one. Flood
+control (RetryAfter) holds the chat back for as long as Telegram asks and the
+same message is retried; other failures are counted on the outbox rows and
+retried on the next drain. Rows are marked sent in the same transaction that
+marks their jobs sent, so a crash mid-send never drops a queued job, and only
+the single message in flight when the process died can be sent twice.
+"""
+import time
+import asyncio
+import logging
+from typing import List, Dict, Optional, Tuple
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import RetryAfter, BadRequest, Forbidden, TelegramError
+from async_db import get_async_db
+from job import Job
+from utils import format_job_message
+from config import (
+    TELEGRAM_BOT_TOKEN,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_DIGEST_SIZE,
+    TELEGRAM_MAX_SEND_ATTEMPTS,
+)
+
+logger = logging.getLogger("jobbot.delivery")
+db = get_async_db()
+
+# Most outbox rows one drain picks up; the rest wait for the next one
+DRAIN_LIMIT = 500
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Empty the bucket and start refilling only after `seconds` (flood control)."""
+        self.tokens = 0.0
+        self.updated = time.monotonic() + seconds
+
+
+def job_keyboard(jobs: List[Job]) -> InlineKeyboardMarkup:
+    """Accept/Decline buttons: one row for a single job, one numbered row per job in a digest."""
+    if len(jobs) == 1:
+        job_id = jobs[0].id
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton("✅ Accept", callback_data=f"accept:{job_id}"),
+             InlineKeyboardButton("❌ Decline", callback_data=f"decline:{job_id}")]
+        ])
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"✅ Accept {i}", callback_data=f"accept:{job.id}"),
+         InlineKeyboardButton(f"❌ Decline {i}", callback_data=f"decline:{job.id}")]
+        for i, job in enumerate(jobs, 1)
+    ])
+
+
+def format_digest(jobs: List[Job]) -> str:
+    lines = [f"📬 {len(jobs)} new jobs"]
+    for i, job in enumerate(jobs, 1):
+        details = [job.location]
+        if job.cv_match_score is not None:
+            details.append(f"🎯 {job.cv_match_score * 100:.0f}%")
+        lines.append("")
+        lines.append(f"{i}. {job.title or 'Untitled role'} – {job.company or 'Unknown company'}")
+        lines.append("   " + " · ".join(d for d in details if d))
+        if job.url:
+            lines.append(f"   {job.url}")
+    return "\n".join(lines)
+
+
+def render(jobs: List[Job]) -> Tuple[str, InlineKeyboardMarkup]:
+    text = format_job_message(jobs[0]) if len(jobs) == 1 else format_digest(jobs)
+    return text, job_keyboard(jobs)
+
+
+class DeliveryQueue:
+    def __init__(self, bot: Bot, digest_size: int = TELEGRAM_DIGEST_SIZE):
+        self.bot = bot
+        self.digest_size = digest_size
+        self.global_bucket = TokenBucket(TELEGRAM_GLOBAL_RATE, max(1, int(TELEGRAM_GLOBAL_RATE)))
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        # One drain at a time, so an outbox row is never picked up by two senders
+        self._drain_lock = asyncio.Lock()
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        if chat_id not in self._chat_buckets:
+            self._chat_buckets[chat_id] = TokenBucket(TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST)
+        return self._chat_buckets[chat_id]
+
+    async def deliver(self, jobs: List[Job], chat_id: str = TELEGRAM_CHAT_ID) -> int:
+        """Queue jobs for chat_id, then send everything still undelivered to it. Returns jobs delivered."""
+        if not chat_id:
+            logger.error("TELEGRAM_CHAT_ID is not set, not sending jobs.")
+            return 0
+        if jobs:
+            queued = await db.add_deliveries(chat_id, [job.id for job in jobs])
+            logger.info(f"Queued {queued} of {len(jobs)} jobs for delivery to {chat_id}.")
+        return await self.drain(chat_id)
+
+    async def drain(self, chat_id: str) -> int:
+        async with self._drain_lock:
+            pending = await db.get_pending_deliveries(chat_id, DRAIN_LIMIT)
+            delivered = 0
+            for i in range(0, len(pending), self.digest_size):
+                group = pending[i : i + self.digest_size]
+                if await self._send(chat_id, group):
+                    delivered += len(group)
+            if len(pending) > delivered:
+                logger.warning(f"{len(pending) - delivered} jobs for {chat_id} left undelivered this run.")
+            return delivered
+
+    async def _send(self, chat_id: str, deliveries: List[Tuple[int, Job]]) -> bool:
+        outbox_ids = [outbox_id for outbox_id, _ in deliveries]
+        jobs = [job for _, job in deliveries]
+        text, keyboard = render(jobs)
+        bucket = self._chat_bucket(chat_id)
+
+        for _ in range(TELEGRAM_MAX_SEND_ATTEMPTS):
+            await self.global_bucket.acquire()
+            await bucket.acquire()
+            try:
+                await self.bot.send_message(
+                    chat_id=chat_id, text=text, reply_markup=keyboard, disable_web_page_preview=True
+                )
+            except RetryAfter as e:
+                logger.warning(f"Flood control for chat {chat_id}, retrying in {e.retry_after}s.")
+                bucket.pause(float(e.retry_after))
+                continue
+            except (BadRequest, Forbidden) as e:
+                # Retrying the same message won't help
+                logger.error(f"Telegram rejected message for jobs {[job.id for job in jobs]}: {e}")
+                await db.mark_deliveries_failed(outbox_ids, TELEGRAM_MAX_SEND_ATTEMPTS, permanent=True)
+                return False
+            except TelegramError as e:
+                logger.warning(f"Sending to chat {chat_id} failed, will retry next run: {e}")
+                await db.mark_deliveries_failed(outbox_ids, TELEGRAM_MAX_SEND_ATTEMPTS)
+                return False
+            await db.mark_deliveries_sent(outbox_ids)
+            return True
+
+        # Still flood-controlled: leave the rows pending without counting it as a failure
+        return False
+
+
+_queue: Optional[DeliveryQueue] = None
+# Set when get_delivery_queue() created the Bot itself, so close_delivery_queue() shuts it down
+_own_bot: Optional[Bot] = None
+
+
+async def get_delivery_queue(bot: Optional[Bot] = None) -> DeliveryQueue:
+    """Return the process-wide DeliveryQueue, creating (and initializing) a Bot if none is given."""
+    global _queue, _own_bot
+    if _queue is None:
+        if bot is None:
+            bot = _own_bot = Bot(TELEGRAM_BOT_TOKEN)
+            await bot.initialize()
+        _queue = DeliveryQueue(bot)
+    return _queue
+
+
+async def close_delivery_queue():
+    global _queue, _own_bot
+    if _own_bot is not None:
+        await _own_bot.shutdown()
+        _own_bot = None
+    _queue = None
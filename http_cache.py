@@ -0,0 +1,121 @@
+"""
+On-disk HTTP response cache for the scrapers.
+
+Stores each GET response body with its ETag/Last-Modified validators so
+repeat fetches can be sent as conditional requests (304 Not Modified), and
+so a URL fetched within its minimum refetch interval isn't requested at all.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional, Dict, Any
+import httpx
+from config import HTTP_CACHE_DIR
+
+logger = logging.getLogger("jobbot.http_cache")
+
+# Only headers that still describe the (already decoded) body are kept
+_KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+
+class HTTPCache:
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        request_url = httpx.URL(url, params=sorted((params or {}).items()))
+        return hashlib.sha256(str(request_url).encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry (metadata plus "body") or None."""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r") as f:
+                entry = json.load(f)
+            with open(body_path, "rb") as f:
+                entry["body"] = f.read()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, response: httpx.Response):
+        """Store a successful response body and its validators."""
+        meta_path, body_path = self._paths(key)
+        entry = {
+            "url": str(response.request.url),
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in _KEPT_HEADERS},
+            "fetched_at": time.time(),
+        }
+        try:
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            # Write body first so a metadata file never points at a missing body
+            self._atomic_write(body_path, response.content)
+            self._atomic_write(meta_path, json.dumps(entry).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"[HTTP_CACHE] Could not store {entry['url']}: {e}")
+
+    def touch(self, key: str, entry: Dict[str, Any]):
+        """Record that a cached entry was revalidated (304) just now."""
+        meta_path, _ = self._paths(key)
+        meta = {k: v for k, v in entry.items() if k != "body"}
+        meta["fetched_at"] = time.time()
+        try:
+            self._atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"[HTTP_CACHE] Could not refresh {entry.get('url')}: {e}")
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        cached = {k.lower(): v for k, v in entry.get("headers", {}).items()}
+        if "etag" in cached:
+            headers["If-None-Match"] = cached["etag"]
+        if "last-modified" in cached:
+            headers["If-Modified-Since"] = cached["last-modified"]
+        return headers
+
+    @staticmethod
+    def to_response(entry: Dict[str, Any], method: str = "GET") -> httpx.Response:
+        return httpx.Response(
+            status_code=200,
+            headers=entry.get("headers", {}),
+            content=entry["body"],
+            request=httpx.Request(method, entry["url"]),
+        )
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete entries not fetched or revalidated within max_age_seconds."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                meta_path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(meta_path) >= cutoff:
+                        continue
+                    os.remove(meta_path)
+                    body_path = meta_path[: -len(".json")] + ".body"
+                    if os.path.exists(body_path):
+                        os.remove(body_path)
+                    removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    @staticmethod
+    def _atomic_write(path: str, payload: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
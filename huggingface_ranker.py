@@ -1,20 +1,101 @@
 import os
+import time
+import hashlib
 import logging
-from typing import List, Dict, Tuple
-from sentence_transformers import SentenceTransformer, util
-from transformers import pipeline
-from config import CV_PATH, RANKING_THRESHOLD, COMPANY_RATING_THRESHOLD
+import threading
+import numpy as np
+from typing import List, Dict, Tuple, Optional
+from config import (
+    CV_PATH,
+    RANKING_THRESHOLD,
+    COMPANY_RATING_THRESHOLD,
+    COMPANY_RATING_TTL_HOURS,
+    SENTIMENT_BATCH_SIZE,
+    RANKER_BACKEND,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZE,
+    BACKEND_SCORE_TOLERANCE,
+)
+from db import DBHandler
+from job import Job
+from prefilter import prefilter_jobs
+import onnx_backend
 
 logger = logging.getLogger("jobbot.hf_ranker")
 
 # Set cache path for Hugging Face transformers
 os.environ["TRANSFORMERS_CACHE"] = os.getenv("TRANSFORMERS_CACHE", "/home/ubuntu/.cache/huggingface/hub")
 
-# Load embedding model once (reuse)
-_embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_MODEL_ID = f"sentence-transformers/{EMBEDDING_MODEL_NAME}"
+SENTIMENT_MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
 
-# Load sentiment analysis pipeline once (reuse)
-_sentiment_pipeline = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+
+def _resolve_backend(requested: str = RANKER_BACKEND) -> str:
+    if requested == "onnx":
+        if onnx_backend.is_available():
+            return "onnx"
+        logger.error("[BACKEND] RANKER_BACKEND=onnx but optimum[onnxruntime] is not installed; using torch.")
+    elif requested != "torch":
+        logger.error(f"[BACKEND] Unknown RANKER_BACKEND={requested!r}; using torch.")
+    return "torch"
+
+
+BACKEND = _resolve_backend()
+# Embeddings from different backends differ slightly, so they are cached under separate names
+EMBEDDING_CACHE_NAME = (
+    EMBEDDING_MODEL_NAME if BACKEND == "torch"
+    else f"{EMBEDDING_MODEL_NAME}:onnx{'-int8' if ONNX_QUANTIZE else ''}"
+)
+
+db = DBHandler()
+
+# Models are loaded on first use (or by warmup()), never at import time
+_model_lock = threading.Lock()
+_embedding_model = None
+_sentiment_pipeline = None
+
+
+def load_embedding_model(backend: str = BACKEND):
+    """Build a new embedding model for the given backend."""
+    if backend == "onnx":
+        return onnx_backend.OnnxSentenceEncoder(
+            EMBEDDING_MODEL_ID, os.path.join(ONNX_MODEL_DIR, EMBEDDING_MODEL_NAME), quantize=ONNX_QUANTIZE
+        )
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+def load_sentiment_pipeline(backend: str = BACKEND):
+    """Build a new sentiment-analysis pipeline for the given backend."""
+    if backend == "onnx":
+        return onnx_backend.load_sentiment_pipeline(
+            SENTIMENT_MODEL_NAME, os.path.join(ONNX_MODEL_DIR, SENTIMENT_MODEL_NAME), quantize=ONNX_QUANTIZE
+        )
+    from transformers import pipeline
+
+    return pipeline("sentiment-analysis", model=SENTIMENT_MODEL_NAME)
+
+
+def get_embedding_model():
+    """Return the shared embedding model, loading it on first use."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _model_lock:
+            if _embedding_model is None:
+                _embedding_model = load_embedding_model()
+    return _embedding_model
+
+
+def get_sentiment_pipeline():
+    """Return the shared sentiment-analysis pipeline, loading it on first use."""
+    global _sentiment_pipeline
+    if _sentiment_pipeline is None:
+        with _model_lock:
+            if _sentiment_pipeline is None:
+                _sentiment_pipeline = load_sentiment_pipeline()
+    return _sentiment_pipeline
 
 
 def load_cv_text(cv_path: str = CV_PATH) -> str:
@@ -30,45 +111,183 @@ def load_cv_text(cv_path: str = CV_PATH) -> str:
         return ""
 
 
-CV_TEXT = load_cv_text()
+# CV text and embedding cache, keyed by (path, mtime) so edits to the CV on disk are picked up
+_cv_lock = threading.Lock()
+_cv_cache: Dict[str, object] = {"key": None, "text": "", "embedding": None}
+
+
+def _cv_mtime(cv_path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(cv_path)
+    except OSError:
+        return None
+
+
+def get_cv_embedding(cv_path: str = CV_PATH) -> np.ndarray:
+    """
+    Return the normalized CV embedding, encoding it at most once per process.
+    The cached embedding is rebuilt when the CV file's mtime changes.
+    """
+    key = (cv_path, _cv_mtime(cv_path))
+    with _cv_lock:
+        if _cv_cache["key"] != key or _cv_cache["embedding"] is None:
+            if _cv_cache["key"] is not None:
+                logger.info(f"CV at {cv_path} changed on disk, re-embedding.")
+            _cv_cache["text"] = load_cv_text(cv_path)
+            _cv_cache["embedding"] = _normalize(
+                get_embedding_model().encode([_cv_cache["text"]], convert_to_numpy=True)
+            )[0]
+            _cv_cache["key"] = key
+        return _cv_cache["embedding"]
+
+
+def warmup():
+    """
+    Load both models and embed the CV ahead of the first ranking run, so the
+    first scrape slot doesn't pay the model start-up cost.
+    """
+    started = time.perf_counter()
+    get_embedding_model()
+    get_sentiment_pipeline()
+    get_cv_embedding()
+    logger.info(f"Ranker ({BACKEND} backend) warmed up in {time.perf_counter() - started:.1f}s.")
+
+
+# Short, varied texts used to compare backends against the fp32 reference
+PARITY_SAMPLES = [
+    "Part-time retail assistant. Serving customers, operating tills and restocking shelves.",
+    "Warehouse operative. Picking and packing orders, loading vans, manual handling.",
+    "Delivery driver. Multi-drop deliveries around Wigan, full UK licence required.",
+    "Senior software engineer. Design distributed systems in Go and Kubernetes.",
+    "Kitchen porter. Washing up, keeping the kitchen clean, evening and weekend shifts.",
+    "Great place to work, supportive managers and flexible hours.",
+    "Terrible management, constant understaffing and unpaid overtime.",
+]
+
+
+def check_backend_parity(backend: str = "onnx", tolerance: float = BACKEND_SCORE_TOLERANCE) -> Dict:
+    """
+    Score PARITY_SAMPLES with both the fp32 torch models and `backend`, and
+    check the semantic scores agree within `tolerance` and sentiment labels match.
+    """
+    reference_model = load_embedding_model("torch")
+    candidate_model = load_embedding_model(backend)
+    anchor = PARITY_SAMPLES[:1]
+
+    def scores(model) -> np.ndarray:
+        embs = _normalize(np.asarray(model.encode(PARITY_SAMPLES, convert_to_numpy=True), dtype=np.float32))
+        ref = _normalize(np.asarray(model.encode(anchor, convert_to_numpy=True), dtype=np.float32))[0]
+        return embs @ ref
+
+    max_delta = float(np.max(np.abs(scores(reference_model) - scores(candidate_model))))
+
+    reference_labels = [r["label"] for r in load_sentiment_pipeline("torch")(PARITY_SAMPLES)]
+    candidate_labels = [r["label"] for r in load_sentiment_pipeline(backend)(PARITY_SAMPLES)]
+    label_agreement = sum(a == b for a, b in zip(reference_labels, candidate_labels)) / len(PARITY_SAMPLES)
+
+    result = {
+        "backend": backend,
+        "max_score_delta": max_delta,
+        "label_agreement": label_agreement,
+        "ok": max_delta <= tolerance and label_agreement == 1.0,
+    }
+    log = logger.info if result["ok"] else logger.warning
+    log(f"[BACKEND_PARITY] {result}")
+    return result
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _job_text(job_title: str, job_desc: str) -> str:
+    return f"{(job_title or '').strip()}. {(job_desc or '').strip()}"
+
+
+def _embedding_key(job_title: str, job_desc: str, model_name: str = EMBEDDING_CACHE_NAME) -> str:
+    """Content hash identifying a job text embedding for a given model."""
+    digest = hashlib.sha256()
+    for part in (model_name, job_title or "", job_desc or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def embed_jobs(jobs: List[Job], batch_size: int = 32) -> np.ndarray:
+    """
+    Return a (len(jobs), dim) float32 matrix of job embeddings.
+    Embeddings are looked up in the on-disk store first; only unseen texts are
+    encoded (in one batched call) and then written back to the store.
+    """
+    keys = [_embedding_key(job.title, job.description) for job in jobs]
+    cached = db.get_embeddings(list(set(keys)))
+
+    missing = {}
+    for key, job in zip(keys, jobs):
+        if key not in cached and key not in missing:
+            missing[key] = _job_text(job.title, job.description)
+
+    vectors: Dict[str, np.ndarray] = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in cached.items()}
+    if missing:
+        encoded = get_embedding_model().encode(list(missing.values()), batch_size=batch_size, convert_to_numpy=True)
+        encoded = np.asarray(encoded, dtype=np.float32)
+        new_vectors = dict(zip(missing.keys(), encoded))
+        db.save_embeddings(EMBEDDING_CACHE_NAME, encoded.shape[1], {k: v.tobytes() for k, v in new_vectors.items()})
+        vectors.update(new_vectors)
+
+    logger.info(f"Job embeddings: {len(cached)} cached, {len(missing)} newly encoded.")
+    return np.vstack([vectors[key] for key in keys])
+
+
+def semantic_scores(jobs: List[Job], batch_size: int = 32) -> List[float]:
+    """
+    Compute semantic similarity between each job posting and the CV text.
+    Job embeddings come from embed_jobs() and are scored with a single
+    cosine-similarity matrix. Returns one score per job, in input order.
+    Model errors propagate: scoring everything 0.0 would drop the jobs as
+    irrelevant, and they would never be ranked again once marked seen.
+    """
+    if not jobs:
+        return []
+    job_embs = _normalize(embed_jobs(jobs, batch_size=batch_size))
+    return (job_embs @ get_cv_embedding()).tolist()
 
 
-def semantic_score(job_title: str, job_desc: str, cv_text: str = CV_TEXT) -> float:
+def semantic_score(job_title: str, job_desc: str) -> float:
     """
     Compute semantic similarity between job posting and CV text.
     Returns cosine similarity in [0,1].
     """
-    try:
-        job_text = f"{job_title.strip()}. {job_desc.strip()}"
-        job_emb = _embedding_model.encode(job_text, convert_to_tensor=True)
-        cv_emb = _embedding_model.encode(cv_text, convert_to_tensor=True)
-        similarity = util.cos_sim(job_emb, cv_emb).item()
-        return similarity
-    except Exception as e:
-        logger.warning(f"[SEMANTIC_FAIL] Could not score job: {e}")
-        return 0.0
+    return semantic_scores([Job(id="", source="", title=job_title, description=job_desc)])[0]
 
 
-def company_rating_and_summary(company_reviews: List[str]) -> Tuple[int, str]:
+def _classify_reviews(reviews: List[str]) -> List[Optional[bool]]:
     """
-    Generate a company rating out of 10 based on sentiment analysis of reviews,
-    and a text summary explaining the rating.
+    Run sentiment analysis over reviews in batches.
+    Returns True (positive), False (negative) or None (failed) per review.
     """
-    if not company_reviews:
-        return 5, "No reviews available."
+    if not reviews:
+        return []
+    # Limit to first 512 chars to avoid pipeline overload
+    truncated = [review[:512] for review in reviews]
+    try:
+        results = get_sentiment_pipeline()(truncated, batch_size=SENTIMENT_BATCH_SIZE)
+    except Exception as e:
+        logger.warning(f"[REVIEW_ANALYSIS_FAIL] Batch failed, retrying reviews one by one: {e}")
+        results = []
+        for review in truncated:
+            try:
+                results.append(get_sentiment_pipeline()(review)[0])
+            except Exception as e:
+                logger.warning(f"[REVIEW_ANALYSIS_FAIL] Skipped review due to error: {e}")
+                results.append(None)
+    return [None if result is None else "positive" in result.get("label", "").lower() for result in results]
 
-    pos, neg = 0, 0
-    for review in company_reviews:
-        try:
-            # Limit to first 512 chars to avoid pipeline overload
-            result = _sentiment_pipeline(review[:512])[0]
-            label = result.get("label", "").lower()
-            if "positive" in label:
-                pos += 1
-            else:
-                neg += 1
-        except Exception as e:
-            logger.warning(f"[REVIEW_ANALYSIS_FAIL] Skipped review due to error: {e}")
+
+def _rating_from_sentiment(sentiments: List[Optional[bool]]) -> Tuple[int, str]:
+    pos = sum(1 for s in sentiments if s is True)
+    neg = sum(1 for s in sentiments if s is False)
 
     total = pos + neg
     if total == 0:
@@ -86,36 +305,101 @@ def company_rating_and_summary(company_reviews: List[str]) -> Tuple[int, str]:
     return score, summary
 
 
-def rank_jobs(jobs: List[Dict]) -> List[Dict]:
+def company_rating_and_summary(company_reviews: List[str]) -> Tuple[int, str]:
     """
-    Filter and rank jobs based on semantic relevance, company rating, and salary thresholds.
-    Returns a list sorted by semantic score (descending), then company rating.
+    Generate a company rating out of 10 based on sentiment analysis of reviews,
+    and a text summary explaining the rating.
     """
-    filtered = []
+    if not company_reviews:
+        return 5, "No reviews available."
+    return _rating_from_sentiment(_classify_reviews(company_reviews))
 
+
+def _company_key(company: str) -> str:
+    return " ".join((company or "").lower().split())
+
+
+def company_ratings(jobs: List[Job]) -> List[Tuple[int, str]]:
+    """
+    Rate the employer of every job, analysing each company once per ranking run.
+    Reviews are grouped by company and classified in a single batched pipeline
+    call; results are cached in the DB for COMPANY_RATING_TTL_HOURS.
+    Returns one (rating, summary) per job, in input order.
+    """
+    reviews_by_company: Dict[str, List[str]] = {}
     for job in jobs:
-        title = job.get("title", "")
-        desc = job.get("description", "")
-        reviews = job.get("company_reviews", [])
-        salary = job.get("salary")
+        key = _company_key(job.company)
+        reviews = reviews_by_company.setdefault(key, [])
+        for review in job.company_reviews or []:
+            if review not in reviews:
+                reviews.append(review)
 
-        sem_score = semantic_score(title, desc)
-        if sem_score < RANKING_THRESHOLD:
-            continue
+    # Unnamed employers can't be cached or shared between jobs
+    rated_companies = [key for key, reviews in reviews_by_company.items() if key and reviews]
+    ratings: Dict[str, Tuple[int, str]] = dict(
+        db.get_company_ratings(rated_companies, int(COMPANY_RATING_TTL_HOURS * 3600))
+    )
 
-        rating, summary = company_rating_and_summary(reviews)
-        if rating < COMPANY_RATING_THRESHOLD:
-            continue
+    to_analyse = [key for key in rated_companies if key not in ratings]
+    flat_reviews = [review for key in to_analyse for review in reviews_by_company[key]]
+    sentiments = _classify_reviews(flat_reviews)
+
+    fresh: Dict[str, Tuple[int, str, int]] = {}
+    offset = 0
+    for key in to_analyse:
+        count = len(reviews_by_company[key])
+        rating, summary = _rating_from_sentiment(sentiments[offset : offset + count])
+        offset += count
+        ratings[key] = (rating, summary)
+        fresh[key] = (rating, summary, count)
+    db.save_company_ratings(fresh)
+
+    logger.info(
+        f"Company ratings: {len(rated_companies) - len(to_analyse)} cached, "
+        f"{len(to_analyse)} analysed from {len(flat_reviews)} reviews."
+    )
+
+    results = []
+    for job in jobs:
+        key = _company_key(job.company)
+        if key in ratings:
+            results.append(ratings[key])
+        else:
+            results.append(company_rating_and_summary(job.company_reviews or []))
+    return results
 
-        if salary is not None and salary < 11000:
+
+def rank_jobs(jobs: List[Job]) -> List[Job]:
+    """
+    Filter and rank jobs based on semantic relevance, company rating, and salary thresholds.
+    Cheap prefilters (salary, hours, location, title, already stored) run before any inference.
+    Returns a list sorted by semantic score (descending), then company rating.
+    """
+    scraped = len(jobs)
+    jobs, dropped = prefilter_jobs(jobs)
+    logger.info(
+        f"Prefilter kept {len(jobs)}/{scraped} jobs; dropped "
+        + ", ".join(f"{name}={count}" for name, count in dropped.items())
+    )
+
+    filtered = []
+    scores = semantic_scores(jobs)
+    relevant = [(job, sem_score) for job, sem_score in zip(jobs, scores) if sem_score >= RANKING_THRESHOLD]
+    ratings = company_ratings([job for job, _ in relevant])
+
+    for (job, sem_score), (rating, summary) in zip(relevant, ratings):
+        if rating < COMPANY_RATING_THRESHOLD:
             continue
 
-        job.update({
-            "semantic_score": sem_score,
-            "company_rating": rating,
-            "company_summary": summary
-        })
+        job.cv_match_score = sem_score
+        job.company_rating = rating
+        job.company_summary = summary
 
         filtered.append(job)
 
-    return sorted(filtered, key=lambda j: (j["semantic_score"], j["company_rating"]), reverse=True)
+    return sort_ranked(filtered)
+
+
+def sort_ranked(jobs: List[Job]) -> List[Job]:
+    """Order ranked jobs by CV match score (descending), then company rating."""
+    return sorted(jobs, key=lambda j: (j.cv_match_score, j.company_rating), reverse=True)
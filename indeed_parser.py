@@ -0,0 +1,156 @@
+"""
+Job card extraction from Indeed result pages.
+
+The fast path parses a page with lxml and reads every card's fields with
+XPath expressions compiled once at import. Without lxml, or when lxml can't
+parse a page, BeautifulSoup is used with a SoupStrainer, so only the job card
+elements are built into a tree rather than the whole page (scripts, nav,
+facets). Both paths return the same Jobs.
+
+Two card layouts are understood: "search" (div.job_seen_beacon, the current
+search results page) and "link" (the older a[data-jk] cards read by
+apply_handler).
+"""
+import logging
+from typing import List, Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from job import Job
+from job_key import canonical_job_id
+from utils import clean_text, parse_salary, salary_period
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = None
+
+logger = logging.getLogger("jobbot.indeed_parser")
+
+BASE_URL = "https://www.indeed.com"
+VIEW_URL = BASE_URL + "/viewjob?jk={}"
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching one token of a space-separated class attribute."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_CARD_XPATHS = {
+    "search": f"//div[{_has_class('job_seen_beacon')}]",
+    "link": "//a[@data-hide-spinner='true'][@data-jk]",
+}
+_STRAINERS = {
+    "search": SoupStrainer("div", class_="job_seen_beacon"),
+    "link": SoupStrainer("a", attrs={"data-hide-spinner": "true", "data-jk": True}),
+}
+
+if etree is not None:
+    # smart_strings=False: plain str results that don't keep the page tree alive
+    def _xpath(expr: str):
+        return etree.XPath(expr, smart_strings=False)
+
+    _LXML_CARDS = {layout: _xpath(expr) for layout, expr in _CARD_XPATHS.items()}
+    _TITLE = _xpath(f"string(.//h2[{_has_class('jobTitle')}])")
+    _ANY_TITLE = _xpath("string(.//h2)")
+    _COMPANY = _xpath(f"string(.//span[{_has_class('companyName')}])")
+    _LOCATION = _xpath(f"string(.//div[{_has_class('companyLocation')}])")
+    _DESCRIPTION = _xpath(f"string(.//div[{_has_class('job-snippet')}])")
+    _SALARY = _xpath(".//div[contains(@class, 'salary-snippet')]")
+    _JOB_KEY = _xpath("(descendant-or-self::a[@data-jk])[1]/@data-jk")
+    _HREF = _xpath("(.//a[@href])[1]/@href")
+
+
+def _make_job(
+    title: str, company: str, location: str, description: str, salary_text: str, job_key: Optional[str], href: str
+) -> Job:
+    title, company, location = clean_text(title), clean_text(company), clean_text(location)
+    salary_text = clean_text(salary_text)
+    if job_key:
+        url = VIEW_URL.format(job_key)
+    else:
+        url = BASE_URL + href if href else ""
+    return Job(
+        id=canonical_job_id("indeed", job_key, url, title, company, location),
+        source="indeed",
+        title=title,
+        company=company,
+        location=location,
+        salary=parse_salary(salary_text) if salary_text else None,
+        description=clean_text(description),
+        url=url,
+        salary_period=salary_period(salary_text),
+    )
+
+
+def _job_from_lxml_card(card) -> Job:
+    salary = _SALARY(card)
+    job_key = _JOB_KEY(card)
+    href = _HREF(card) if not job_key else None
+    return _make_job(
+        _TITLE(card) or _ANY_TITLE(card),
+        _COMPANY(card),
+        _LOCATION(card),
+        _DESCRIPTION(card),
+        salary[0].text_content() if salary else "",
+        job_key[0] if job_key else None,
+        href[0] if href else "",
+    )
+
+
+def job_from_soup_card(card) -> Job:
+    """Adapt one Indeed result card (a BeautifulSoup tag) to a Job."""
+    title_tag = card.find("h2", class_="jobTitle") or card.find("h2")
+    company_tag = card.find("span", class_="companyName")
+    location_tag = card.find("div", class_="companyLocation")
+    desc_tag = card.find("div", class_="job-snippet")
+    salary_tag = card.find("div", class_=lambda c: c and "salary-snippet" in c)
+    if card.name == "a" and card.has_attr("data-jk"):
+        link_tag = card
+    else:
+        link_tag = card.find("a", attrs={"data-jk": True})
+    href_tag = card.find("a", href=True) if link_tag is None else None
+    return _make_job(
+        title_tag.get_text() if title_tag else "",
+        company_tag.get_text() if company_tag else "",
+        location_tag.get_text() if location_tag else "",
+        desc_tag.get_text() if desc_tag else "",
+        salary_tag.get_text() if salary_tag else "",
+        link_tag["data-jk"] if link_tag else None,
+        href_tag["href"] if href_tag else "",
+    )
+
+
+def _parse_lxml(html: str, layout: str) -> List[Job]:
+    root = lxml_html.fromstring(html)
+    jobs = []
+    for card in _LXML_CARDS[layout](root):
+        try:
+            jobs.append(_job_from_lxml_card(card))
+        except Exception as e:
+            logger.warning("Failed to parse Indeed job card: %s", e)
+    return jobs
+
+
+def _parse_soup(html: str, layout: str, strained: bool = True) -> List[Job]:
+    if strained:
+        cards = BeautifulSoup(html, "html.parser", parse_only=_STRAINERS[layout]).find_all(_STRAINERS[layout])
+    else:
+        # The whole page as a tree; kept for comparison in benchmarks.py
+        cards = BeautifulSoup(html, "html.parser").find_all(_STRAINERS[layout])
+    jobs = []
+    for card in cards:
+        try:
+            jobs.append(job_from_soup_card(card))
+        except Exception as e:
+            logger.warning("Failed to parse Indeed job card: %s", e)
+    return jobs
+
+
+def parse_job_cards(html: str, layout: str = "search") -> List[Job]:
+    """Parse the job cards of an Indeed result page, with lxml if available."""
+    if etree is not None:
+        try:
+            return _parse_lxml(html, layout)
+        except (etree.ParserError, ValueError) as e:
+            logger.warning("lxml could not parse Indeed page, falling back to BeautifulSoup: %s", e)
+    return _parse_soup(html, layout)
@@ -0,0 +1,75 @@
+"""
+Job: the one record type a posting travels as, from scraper through ranker to
+the database and Telegram.
+
+A slotted dataclass: no per-instance __dict__, so a job costs a fixed, small
+amount of memory and a misspelt field is an AttributeError rather than a new
+key. Field names are the canonical schema.
+"""
+from dataclasses import dataclass, fields
+from typing import Optional, List, Dict, Any, Tuple
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    source: str
+    title: str = ""
+    company: str = ""
+    location: str = ""
+    salary: Optional[float] = None  # annualised; read back from its TEXT column as a string
+    description: str = ""
+    url: str = ""
+    posted_at: Optional[int] = None
+    # Set by the ranker
+    cv_match_score: Optional[float] = None
+    company_rating: Optional[float] = None
+    company_summary: Optional[str] = None
+    # Set once stored
+    sent: bool = False
+    accepted: Optional[bool] = None
+    timestamp: Optional[int] = None
+    # Optional extras, None rather than empty lists to keep the common case small
+    company_reviews: Optional[List[str]] = None
+    duplicate_ids: Optional[List[str]] = None
+    alternate_urls: Optional[List[str]] = None
+    salary_period: Optional[str] = None  # "hour" or "year" as advertised (see utils.salary_period)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Canonical-key dict of the fields that are set (e.g. for JSON archives)."""
+        return {name: getattr(self, name) for name in _FIELD_NAMES if getattr(self, name) is not None}
+
+    def db_row(self) -> Tuple:
+        """Values for UPSERT_COLUMNS, in order."""
+        return (
+            self.id,
+            self.source,
+            self.title,
+            self.company,
+            self.location,
+            self.salary,
+            self.description,
+            self.url,
+            self.posted_at,
+            self.cv_match_score,
+            self.company_rating,
+            self.company_summary,
+        )
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(Job))
+
+# jobs table columns for the leading Job fields; SELECT them in this order and
+# job_row_factory builds each Job straight from the row tuple
+DB_COLUMNS = (
+    "id", "source", "title", "company", "location", "salary", "description", "url",
+    "posted_at", "cv_match_score", "company_rating", "company_summary",
+    "sent", "accepted", "timestamp",
+)
+# Columns a scrape/rank run writes (see Job.db_row); sent/accepted/timestamp are DB-managed
+UPSERT_COLUMNS = DB_COLUMNS[:12]
+
+
+def job_row_factory(cursor, row: Tuple) -> Job:
+    """sqlite3 row factory for a SELECT of DB_COLUMNS (or a prefix of them), in order."""
+    return Job(*row)
@@ -0,0 +1,177 @@
+"""
+Canonical job identity and cross-source duplicate detection.
+
+Every scraped job gets a deterministic id: "<source>:<native id>" when the
+site exposes one, otherwise a hash of the normalized posting URL (or, failing
+that, of title + company + location). The same vacancy listed on LinkedIn and
+Indeed is caught by a MinHash/LSH index over normalized title+company+location
+shingles and merged before it reaches the ranker.
+"""
+import re
+import random
+import hashlib
+import logging
+from dataclasses import fields
+from typing import List, Dict, Tuple, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from config import DEDUP_SIMILARITY_THRESHOLD
+from job import Job
+
+logger = logging.getLogger("jobbot.job_key")
+
+# Query parameters that identify a posting; everything else (tracking, paging) is dropped
+_ID_QUERY_PARAMS = {"jk", "vjk", "currentjobid"}
+_COMPANY_SUFFIXES = re.compile(r"\b(ltd|limited|plc|llp|uk|group|inc|co)\b\.?")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# MinHash signature of NUM_PERM hashes split into BANDS bands of ROWS rows
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)  # fixed seed: signatures must be stable across runs
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_url(url: str) -> str:
+    """Lowercase scheme/host, drop www., fragments and tracking parameters."""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted((k.lower(), v) for k, v in parse_qsl(parts.query) if k.lower() in _ID_QUERY_PARAMS)
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower()).split())
+
+
+def normalize_company(company: str) -> str:
+    return " ".join(_COMPANY_SUFFIXES.sub(" ", normalize_text(company)).split())
+
+
+def normalize_location(location: str) -> str:
+    """Keep the town only: "Leigh, England, United Kingdom" and "Leigh" should match."""
+    return normalize_text((location or "").split(",")[0])
+
+
+def _short_hash(value: str) -> str:
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+
+def canonical_job_id(
+    source: str,
+    native_id: Optional[str] = None,
+    url: str = "",
+    title: str = "",
+    company: str = "",
+    location: str = "",
+) -> str:
+    """Deterministic job id from the source's own id, else the normalized URL, else the posting text."""
+    if native_id:
+        return f"{source}:{native_id}"
+    normalized = normalize_url(url)
+    if normalized:
+        return f"{source}:u{_short_hash(normalized)}"
+    fingerprint = "|".join((normalize_text(title), normalize_company(company), normalize_location(location)))
+    return f"{source}:t{_short_hash(fingerprint)}"
+
+
+def _shingles(job: Job) -> set:
+    text = " ".join((
+        normalize_text(job.title),
+        normalize_company(job.company),
+        normalize_location(job.location),
+    ))
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i : i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(job: Job) -> Tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in _shingles(job)]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+class DedupIndex:
+    """
+    MinHash/LSH index of jobs. add() returns the job an incoming posting
+    duplicates (estimated Jaccard similarity >= threshold), or None and indexes it.
+    """
+
+    def __init__(self, threshold: float = DEDUP_SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self._jobs: List[Job] = []
+        self._signatures: List[Tuple[int, ...]] = []
+        # Every id dedupe_jobs has seen, kept or merged away, mapped to the job kept for it
+        self.ids: Dict[str, Job] = {}
+
+    def add(self, job: Job) -> Optional[Job]:
+        signature = minhash(job)
+        bands = [(b, signature[b * ROWS : (b + 1) * ROWS]) for b in range(BANDS)]
+
+        candidates = {idx for band in bands for idx in self._buckets.get(band, ())}
+        for idx in sorted(candidates):
+            other = self._signatures[idx]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+            if similarity >= self.threshold:
+                return self._jobs[idx]
+
+        idx = len(self._jobs)
+        self._jobs.append(job)
+        self._signatures.append(signature)
+        for band in bands:
+            self._buckets.setdefault(band, []).append(idx)
+        return None
+
+
+# Fields merge_duplicate may fill from a duplicate; the rest are identity or bookkeeping
+_MERGE_FIELDS = tuple(
+    f.name for f in fields(Job) if f.name not in ("id", "source", "duplicate_ids", "alternate_urls")
+)
+
+
+def merge_duplicate(kept: Job, duplicate: Job):
+    """Fill gaps in `kept` from `duplicate` and remember where else the job was listed."""
+    for name in _MERGE_FIELDS:
+        value = getattr(duplicate, name)
+        if value not in (None, "", []) and getattr(kept, name) in (None, "", []):
+            setattr(kept, name, value)
+    if kept.duplicate_ids is None:
+        kept.duplicate_ids = []
+    kept.duplicate_ids.append(duplicate.id)
+    if duplicate.url:
+        if kept.alternate_urls is None:
+            kept.alternate_urls = []
+        kept.alternate_urls.append(duplicate.url)
+
+
+def dedupe_jobs(jobs: List[Job], index: Optional[DedupIndex] = None) -> Tuple[List[Job], int]:
+    """
+    Drop exact id repeats and merge near-duplicate postings across sources.
+    Returns the unique jobs (first occurrence wins) and the number merged away.
+    Pass the same `index` to dedupe a stream of batches against each other.
+    """
+    index = index or DedupIndex()
+    unique: List[Job] = []
+    seen_ids = index.ids
+    merged = 0
+    for job in jobs:
+        if job.id and job.id in seen_ids:
+            merged += 1
+            continue
+        original = index.add(job)
+        if original is not None:
+            merge_duplicate(original, job)
+            seen_ids.setdefault(job.id, original)
+            merged += 1
+            continue
+        seen_ids[job.id] = job
+        unique.append(job)
+    return unique, merged
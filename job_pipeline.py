@@ -2,68 +2,94 @@ import distutils.errors
 if not hasattr(distutils.errors, "CompileError"):
     distutils.errors.CompileError = distutils.errors.CCompilerError
 
+import signal
 import logging
-from datetime import datetime
 from config import SCRAPE_TIMES, SEND_TIMES
-from scrape_linkedin import scrape_linkedin_jobs
-from scrape_indeed import build_query_params  # This needs to be the actual scraping func, fix if needed
-from huggingface_ranker import rank_jobs
-from telegram_bot import send_jobs_to_telegram
-from cleanup import run_cleanup
-from db import DBHandler
+from scheduler import scheduler
+import ranking_worker
+from stream_pipeline import run_scrape_pipeline
+from telegram_bot import send_jobs_to_telegram, start_telegram_bot, stop_telegram_bot
+from cleanup import run_cleanup_async
+from delivery import close_delivery_queue
+from async_db import get_async_db, close_async_db
+from utils import close_http_client, get_request_metrics
 import asyncio
 
 # Basic logger config - adjust as needed for your production logs
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("jobbot.pipeline")
-db = DBHandler()
+db = get_async_db()
 
-async def schedule_scraping():
-    last_scrape_time = None
-    while True:
-        now = datetime.utcnow().time()
-        for scrape_time_str in SCRAPE_TIMES:
-            scrape_time = datetime.strptime(scrape_time_str, "%H:%M").time()
-            if last_scrape_time != scrape_time and now >= scrape_time:
-                logger.info(f"Starting scraping at {scrape_time_str}")
-                linkedin_jobs = await scrape_linkedin_jobs()
-                indeed_jobs = await build_query_params()  # Replace with actual async scrape_indeed_jobs if exists
-                all_jobs = linkedin_jobs + indeed_jobs
-                logger.info(f"Scraped {len(all_jobs)} jobs total.")
+async def run_scraping():
+    logger.info("Starting scraping run.")
+    # Start a fresh metrics period so the summary below covers this run only
+    get_request_metrics(reset=True)
+    totals = await run_scrape_pipeline()
+    logger.info(
+        f"Scraped {totals['scraped']} jobs total, {totals['merged']} cross-source duplicates merged; "
+        f"saved {totals['ranked']} ranked jobs to DB: {totals['inserted']} new, "
+        f"{totals['updated']} updated, {totals['skipped']} skipped."
+    )
+    for host, stats in get_request_metrics(reset=True).items():
+        logger.info(
+            f"HTTP {host}: {stats['requests']} requests, {stats['errors']} errors, "
+            f"avg {stats['avg_s']:.2f}s, max {stats['max_s']:.2f}s"
+        )
 
-                ranked_jobs = rank_jobs(all_jobs)
-                db.save_jobs(ranked_jobs)
-                logger.info(f"Saved {len(ranked_jobs)} ranked jobs to DB.")
+async def run_sending():
+    logger.info("Sending jobs to Telegram.")
+    jobs_to_send = await db.get_jobs_to_send(limit=50)
+    delivered = await send_jobs_to_telegram(jobs_to_send)
+    logger.info(f"Sent {delivered} jobs to Telegram.")
 
-                last_scrape_time = scrape_time
-                # Sleep enough to avoid retrigger within the same minute window
-                await asyncio.sleep(60)
-                break
-        await asyncio.sleep(30)
-
-async def schedule_sending():
-    last_send_time = None
-    while True:
-        now = datetime.utcnow().time()
-        for send_time_str in SEND_TIMES:
-            send_time = datetime.strptime(send_time_str, "%H:%M").time()
-            if last_send_time != send_time and now >= send_time:
-                logger.info(f"Sending jobs to Telegram at {send_time_str}")
-                jobs_to_send = db.get_jobs_to_send(limit=50)
-                await send_jobs_to_telegram(jobs_to_send)
-                logger.info(f"Sent {len(jobs_to_send)} jobs to Telegram.")
-
-                run_cleanup()
-                last_send_time = send_time
-                await asyncio.sleep(60)
-                break
-        await asyncio.sleep(30)
+    await run_cleanup_async()
 
 async def main():
+    """
+    Service entry point: the Telegram bot, the ranking workers and the scrape
+    and send schedules share one event loop, one DB writer, one HTTP pool and
+    one set of models. SIGINT/SIGTERM shut everything down in order.
+    """
     logger.info("Job pipeline started.")
-    scraping_task = asyncio.create_task(schedule_scraping())
-    sending_task = asyncio.create_task(schedule_sending())
-    await asyncio.gather(scraping_task, sending_task)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Not available on Windows; Ctrl+C still raises KeyboardInterrupt there
+            pass
+
+    app = await start_telegram_bot()
+    # Start the ranking workers (and load their models) well ahead of the first SCRAPE_TIMES slot
+    warmup_task = asyncio.create_task(ranking_worker.start())
+    scheduler.add("scrape", SCRAPE_TIMES, run_scraping)
+    scheduler.add("send", SEND_TIMES, run_sending)
+    schedule_tasks = scheduler.start()
+    stop_task = asyncio.create_task(stop.wait())
+    tasks = [warmup_task, *schedule_tasks]
+    try:
+        # Run until asked to stop, or until a schedule loop dies with an error
+        pending = {stop_task, *schedule_tasks}
+        while not stop_task.done():
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            failed = [task for task in done if task is not stop_task and not task.cancelled() and task.exception()]
+            if failed:
+                logger.error("Background task failed, shutting down.", exc_info=failed[0].exception())
+                break
+    finally:
+        logger.info("Shutting down...")
+        # Stop taking updates first, then stop the schedules, then release shared resources
+        await stop_telegram_bot(app)
+        stop_task.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(stop_task, *tasks, return_exceptions=True)
+        ranking_worker.shutdown()
+        await close_http_client()
+        await close_delivery_queue()
+        await close_async_db()
+        logger.info("Job pipeline stopped.")
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,99 @@
+"""
+ONNX Runtime inference backend for the ranker models.
+
+Models are exported from the Hugging Face hub with optimum on first use,
+optionally dynamically quantized to int8, and cached under ONNX_MODEL_DIR.
+Requires `optimum[onnxruntime]`; callers should check is_available() first.
+"""
+import os
+import logging
+import importlib.util
+from typing import List
+import numpy as np
+
+logger = logging.getLogger("jobbot.onnx_backend")
+
+_QUANTIZED_FILE = "model_quantized.onnx"
+_FP32_FILE = "model.onnx"
+
+
+def is_available() -> bool:
+    """True if optimum's onnxruntime integration can be imported."""
+    try:
+        return importlib.util.find_spec("optimum.onnxruntime") is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def _export(model_cls, model_id: str, model_dir: str, quantize: bool) -> str:
+    """Export model_id to ONNX in model_dir (once) and return the ONNX file name to load."""
+    from transformers import AutoTokenizer
+
+    file_name = _QUANTIZED_FILE if quantize else _FP32_FILE
+    if os.path.exists(os.path.join(model_dir, file_name)):
+        return file_name
+
+    logger.info(f"Exporting {model_id} to ONNX in {model_dir} (quantize={quantize})...")
+    os.makedirs(model_dir, exist_ok=True)
+    model = model_cls.from_pretrained(model_id, export=True)
+    model.save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(model_dir)
+
+    if quantize:
+        from optimum.onnxruntime import ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        quantizer = ORTQuantizer.from_pretrained(model)
+        quantizer.quantize(
+            save_dir=model_dir,
+            quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+        )
+    return file_name
+
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in replacement for the parts of SentenceTransformer.encode() the ranker
+    uses: mean-pooled token embeddings returned as a float32 numpy matrix.
+    """
+
+    def __init__(self, model_id: str, model_dir: str, quantize: bool = True, max_length: int = 256):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        file_name = _export(ORTModelForFeatureExtraction, model_id, model_dir, quantize)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_dir, file_name=file_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+    def encode(self, sentences: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        batches = []
+        for i in range(0, len(sentences), batch_size):
+            inputs = self.tokenizer(
+                sentences[i : i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            token_embeddings = self.model(**inputs).last_hidden_state
+            token_embeddings = np.asarray(token_embeddings, dtype=np.float32)
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            batches.append(pooled)
+        if not batches:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+        return np.vstack(batches)
+
+
+def load_sentiment_pipeline(model_id: str, model_dir: str, quantize: bool = True):
+    """Build a transformers sentiment-analysis pipeline running on ONNX Runtime."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer, pipeline
+
+    file_name = _export(ORTModelForSequenceClassification, model_id, model_dir, quantize)
+    model = ORTModelForSequenceClassification.from_pretrained(model_dir, file_name=file_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
@@ -0,0 +1,110 @@
+import logging
+from typing import Callable, Dict, List, Tuple
+from job import Job
+from utils import parse_salary, salary_period, HOURS_PER_YEAR
+from config import (
+    MIN_SALARY_ANNUAL,
+    MIN_SALARY_HOURLY,
+    PART_TIME_ONLY,
+    TOWN,
+    POSTCODE,
+    NEARBY_TOWNS,
+    TITLE_BLOCKLIST,
+)
+from db import DBHandler
+
+logger = logging.getLogger("jobbot.prefilter")
+db = DBHandler()
+
+# A stage takes a batch of jobs and returns the ones to keep
+Stage = Callable[[List[Job]], List[Job]]
+
+FULL_TIME_MARKERS = ("full time", "full-time", "fulltime")
+PART_TIME_MARKERS = ("part time", "part-time", "parttime")
+
+
+def per_job(predicate: Callable[[Job], bool]) -> Stage:
+    """Turn a keep/drop predicate on a single job into a stage."""
+    def stage(jobs: List[Job]) -> List[Job]:
+        return [job for job in jobs if predicate(job)]
+    return stage
+
+
+def meets_salary_floor(job: Job) -> bool:
+    """
+    Keep jobs with no salary, jobs paid hourly at or above MIN_SALARY_HOURLY,
+    and jobs paid annually at or above MIN_SALARY_ANNUAL. Salaries are
+    annualised by parse_salary, so hourly ones are converted back first.
+    """
+    salary, period = job.salary, job.salary_period
+    if isinstance(salary, str):
+        period = period or salary_period(salary)
+        salary = parse_salary(salary)
+    if salary is None:
+        return True
+    if period == "hour":
+        return salary / HOURS_PER_YEAR >= MIN_SALARY_HOURLY
+    return salary >= MIN_SALARY_ANNUAL
+
+
+def matches_hours(job: Job) -> bool:
+    """When PART_TIME_ONLY, drop postings advertised as full time only."""
+    if not PART_TIME_ONLY:
+        return True
+    text = f"{job.title} {job.description}".lower()
+    if any(marker in text for marker in PART_TIME_MARKERS):
+        return True
+    return not any(marker in text for marker in FULL_TIME_MARKERS)
+
+
+_AREA_TOKENS = [t.lower() for t in [TOWN, *NEARBY_TOWNS, POSTCODE.split()[0] if POSTCODE else "", "remote"] if t]
+
+
+def within_radius(job: Job) -> bool:
+    """Keep jobs whose location names TOWN, a NEARBY_TOWNS entry or our postcode district."""
+    location = (job.location or "").lower()
+    if not location:
+        return True
+    return any(token in location for token in _AREA_TOKENS)
+
+
+def title_allowed(job: Job) -> bool:
+    """Drop jobs whose title contains a TITLE_BLOCKLIST keyword."""
+    title = (job.title or "").lower()
+    return not any(keyword in title for keyword in TITLE_BLOCKLIST)
+
+
+def not_already_stored(jobs: List[Job]) -> List[Job]:
+    """Drop jobs whose id is already in the DB (one query for the whole batch)."""
+    ids = [job.id for job in jobs if job.id]
+    existing = db.get_existing_job_ids(ids)
+    return [job for job in jobs if job.id not in existing]
+
+
+# Cheapest stages first; append to this list to plug in extra filters
+PREFILTERS: List[Tuple[str, Stage]] = [
+    ("salary", per_job(meets_salary_floor)),
+    ("hours", per_job(matches_hours)),
+    ("location", per_job(within_radius)),
+    ("title", per_job(title_allowed)),
+    ("already_stored", not_already_stored),
+]
+
+
+def prefilter_jobs(jobs: List[Job], stages: List[Tuple[str, Stage]] = None) -> Tuple[List[Job], Dict[str, int]]:
+    """
+    Run jobs through the cheap filter stages before any model inference.
+    Returns the surviving jobs and the number of jobs each stage dropped.
+    """
+    stages = PREFILTERS if stages is None else stages
+    dropped: Dict[str, int] = {name: 0 for name, _ in stages}
+    for name, stage in stages:
+        before = len(jobs)
+        try:
+            jobs = stage(jobs)
+        except Exception as e:
+            logger.warning(f"[PREFILTER_FAIL] Stage {name} skipped due to error: {e}")
+        dropped[name] = before - len(jobs)
+        if not jobs:
+            break
+    return jobs, dropped
@@ -0,0 +1,81 @@
+"""
+Runs rank_jobs in long-lived worker processes so CPU-bound inference never
+blocks the asyncio event loop. Each worker loads the models once (via
+huggingface_ranker.warmup) and then ranks chunks of jobs streamed to it.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+from config import RANKER_WORKERS
+from job import Job
+
+logger = logging.getLogger("jobbot.ranking_worker")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker():
+    import huggingface_ranker
+
+    huggingface_ranker.warmup()
+
+
+def _ping() -> bool:
+    return True
+
+
+def _rank_chunk(jobs: List[Job]) -> List[Job]:
+    from huggingface_ranker import rank_jobs
+
+    return rank_jobs(jobs)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Return the shared ranking pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        # spawn: never fork a parent that may hold threads, sockets or an event loop
+        _pool = ProcessPoolExecutor(
+            max_workers=RANKER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        logger.info(f"Started ranking pool with {RANKER_WORKERS} worker(s).")
+    return _pool
+
+
+async def start():
+    """Spawn the workers and wait until their models are loaded."""
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    await asyncio.gather(*(loop.run_in_executor(pool, _ping) for _ in range(RANKER_WORKERS)))
+    logger.info("Ranking workers ready.")
+
+
+async def rank_chunk_async(jobs: List[Job]) -> List[Job]:
+    """Rank one chunk of jobs in the worker pool; the result is sorted within the chunk only."""
+    global _pool
+    if not jobs:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    try:
+        return await loop.run_in_executor(pool, _rank_chunk, jobs)
+    except BrokenProcessPool:
+        logger.error("[RANK_WORKER_DIED] Ranking pool broke; it will be restarted on next use.")
+        # Reap the dead pool's surviving workers and management thread
+        pool.shutdown(wait=False, cancel_futures=True)
+        if _pool is pool:
+            _pool = None
+        raise
+
+
+def shutdown():
+    """Stop the worker processes."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,139 @@
+"""
+Daily scheduler for the scrape and send runs.
+
+Each job fires at fixed local times of day in SCHEDULE_TIMEZONE (so
+"08:30" stays 08:30 in London across BST changes). A job's loop sleeps until
+its next fire time rather than polling. The time of the last completed slot is
+persisted in the stats table, so after downtime the most recent missed slot is
+run once on startup. A slot that comes round while the previous run of the
+same job is still going is skipped, never run concurrently.
+"""
+import asyncio
+import logging
+from datetime import datetime, time, timedelta, timezone
+from typing import List, Dict, Callable, Awaitable, Optional
+from zoneinfo import ZoneInfo
+from async_db import get_async_db
+from config import SCHEDULE_TIMEZONE
+
+logger = logging.getLogger("jobbot.scheduler")
+db = get_async_db()
+
+# Longest single sleep; waking up to re-check guards against wall-clock jumps (NTP, suspend)
+_MAX_SLEEP_SECONDS = 600
+
+
+def parse_times(values: List[str]) -> List[time]:
+    """Parse "HH:MM" strings once, skipping (and logging) invalid ones."""
+    times = set()
+    for value in values:
+        try:
+            times.add(datetime.strptime(value, "%H:%M").time())
+        except (ValueError, TypeError):
+            logger.error(f"Ignoring invalid schedule time {value!r}, expected HH:MM.")
+    return sorted(times)
+
+
+class DailyJob:
+    def __init__(self, name: str, times: List[time], func: Callable[[], Awaitable], catch_up: bool = True):
+        self.name = name
+        self.times = times
+        self.func = func
+        self.catch_up = catch_up
+        self.next_run: Optional[datetime] = None
+        self.running = False
+
+    @property
+    def state_key(self) -> str:
+        return f"schedule_last_run:{self.name}"
+
+
+class Scheduler:
+    def __init__(self, tz_name: str = SCHEDULE_TIMEZONE):
+        self.tz = ZoneInfo(tz_name)
+        self.jobs: Dict[str, DailyJob] = {}
+
+    def add(self, name: str, times: List[str], func: Callable[[], Awaitable], catch_up: bool = True) -> DailyJob:
+        job = DailyJob(name, parse_times(times), func, catch_up)
+        self.jobs[name] = job
+        return job
+
+    def _slots(self, job: DailyJob, day) -> List[datetime]:
+        # Wall-clock times in self.tz; a time skipped by a DST change resolves to the hour after
+        return [datetime.combine(day, t, tzinfo=self.tz) for t in job.times]
+
+    def next_fire(self, job: DailyJob, after: datetime) -> Optional[datetime]:
+        """First slot strictly after `after`."""
+        local = after.astimezone(self.tz)
+        for offset in range(2):
+            for slot in self._slots(job, local.date() + timedelta(days=offset)):
+                if slot > after:
+                    return slot
+        return None
+
+    def previous_fire(self, job: DailyJob, before: datetime) -> Optional[datetime]:
+        """Latest slot at or before `before`."""
+        local = before.astimezone(self.tz)
+        for offset in range(2):
+            for slot in reversed(self._slots(job, local.date() - timedelta(days=offset))):
+                if slot <= before:
+                    return slot
+        return None
+
+    def next_runs(self) -> Dict[str, Optional[datetime]]:
+        """Next fire time of every job, in the scheduler's timezone."""
+        return {name: job.next_run for name, job in self.jobs.items()}
+
+    def start(self) -> List[asyncio.Task]:
+        """Start a loop per job that has valid times; the loops run until cancelled."""
+        tasks = []
+        for job in self.jobs.values():
+            if not job.times:
+                logger.warning(f"No valid times for scheduled job '{job.name}', not scheduling it.")
+                continue
+            tasks.append(asyncio.create_task(self._run_forever(job), name=f"schedule:{job.name}"))
+        return tasks
+
+    async def _run_forever(self, job: DailyJob):
+        now = datetime.now(timezone.utc)
+        last_run = await db.get_stat(job.state_key)
+        missed = self.previous_fire(job, now)
+        if job.catch_up and last_run is not None and missed is not None and missed.timestamp() > last_run:
+            logger.info(f"Catching up '{job.name}' run missed at {missed:%Y-%m-%d %H:%M %Z}.")
+            await self._run(job, missed)
+
+        while True:
+            now = datetime.now(timezone.utc)
+            job.next_run = self.next_fire(job, now)
+            logger.info(f"Next '{job.name}' run at {job.next_run:%Y-%m-%d %H:%M %Z}.")
+            while True:
+                remaining = (job.next_run - datetime.now(timezone.utc)).total_seconds()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, _MAX_SLEEP_SECONDS))
+            await self._run(job, job.next_run)
+            skipped = self.next_fire(job, job.next_run)
+            if skipped is not None and skipped <= datetime.now(timezone.utc):
+                logger.warning(f"'{job.name}' run overran its {skipped:%H:%M} slot; that slot is skipped.")
+
+    async def _run(self, job: DailyJob, slot: datetime):
+        if job.running:
+            logger.warning(f"Skipping '{job.name}' run for {slot:%H:%M}: previous run still in progress.")
+            return
+        job.running = True
+        started = datetime.now(timezone.utc)
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Scheduled job '{job.name}' failed.")
+        finally:
+            job.running = False
+        # Recorded even when the run failed, so a crashing job isn't re-run on every restart
+        await db.set_stat(job.state_key, int(slot.timestamp()))
+        elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+        logger.info(f"'{job.name}' run for {slot:%H:%M} finished in {elapsed:.0f}s.")
+
+
+scheduler = Scheduler()
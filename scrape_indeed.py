@@ -1,13 +1,26 @@
-import requests
+import asyncio
+import random
 import logging
 import json
-from typing import List, Dict
-from utils import safe_request, clean_text, parse_salary
-from config import INDEED_COOKIES_PATH, RADIUS_MILES, POSTCODE, PART_TIME_ONLY
+from typing import List, Dict, Optional, AsyncIterator
+from utils import safe_request
+from scrape_state import IncrementalScrape
+from job import Job
+from indeed_parser import parse_job_cards
+from config import (
+    INDEED_COOKIES_PATH,
+    RADIUS_MILES,
+    POSTCODE,
+    PART_TIME_ONLY,
+    INDEED_CONCURRENCY,
+    INDEED_REQUEST_DELAY,
+)
 
 logger = logging.getLogger("jobbot.scrape_indeed")
 
 BASE_URL = "https://www.indeed.com/jobs"
+# Indeed paginates search results with start=0, 10, 20, ...
+PAGE_SIZE = 10
 
 try:
     with open(INDEED_COOKIES_PATH, "r") as f:
@@ -34,68 +47,74 @@ def build_query_params(start: int = 0) -> Dict[str, str]:
     }
     return params
 
-def scrape_indeed_jobs(max_jobs: int = 100) -> List[Dict]:
-    jobs = []
+async def _fetch_page(semaphore: asyncio.Semaphore, start: int) -> Optional[List[Job]]:
+    """Fetch and parse one results page. Returns None on request failure."""
+    async with semaphore:
+        response = await safe_request("GET", BASE_URL, headers=HEADERS, params=build_query_params(start))
+        # Politeness delay, held inside the semaphore so it throttles the whole scraper
+        await asyncio.sleep(INDEED_REQUEST_DELAY * random.uniform(0.75, 1.25))
+    if response is None:
+        logger.error("Indeed scrape failed at start=%s", start)
+        return None
+
+    try:
+        return parse_job_cards(response.text)
+    except Exception as e:
+        logger.error("Error parsing Indeed jobs at start=%s: %s", start, e)
+        return None
+
+async def iter_indeed_pages(
+    max_jobs: int = 100, incremental: bool = True, state: Optional[IncrementalScrape] = None
+) -> AsyncIterator[List[Job]]:
+    """
+    Yield Indeed result pages (lists of not-yet-seen jobs) in Indeed's own
+    order, fetching up to INDEED_CONCURRENCY pages at a time through
+    utils.safe_request. With `incremental`, postings seen by earlier runs are
+    skipped. Results aren't sorted by date, so a known page says nothing about
+    the next one: pagination runs to max_jobs or the last page, and the state
+    should be created with newest_first=False (no high-water mark).
+    """
+    scraped = 0
+    owns_state = state is None
+    if owns_state:
+        state = IncrementalScrape("indeed", enabled=incremental, newest_first=False)
+    await state.load()
+    semaphore = asyncio.Semaphore(INDEED_CONCURRENCY)
     start = 0
 
-    while len(jobs) < max_jobs:
-        params = build_query_params(start)
-        response = safe_request("GET", BASE_URL, headers=HEADERS, params=params)
-        if response is None:
-            logger.error("Indeed scrape failed at start=%s", start)
-            break
-
-        try:
-            # Indeed doesn't have JSON API - scrape HTML and parse jobs out
-            html = response.text
-
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html, "html.parser")
-
-            job_cards = soup.find_all("div", class_="job_seen_beacon")
-            if not job_cards:
-                logger.info("No more Indeed jobs found at start=%s", start)
+    while scraped < max_jobs:
+        # Fetch the next wave of pages concurrently; stop once any page comes back short or known.
+        # With newest-first results the first wave is a single page, since on later runs it is often all we need.
+        pages_needed = -(-(max_jobs - scraped) // PAGE_SIZE)
+        if start == 0 and state.seen and state.newest_first:
+            pages_needed = 1
+        starts = [start + i * PAGE_SIZE for i in range(min(INDEED_CONCURRENCY, pages_needed))]
+        pages = await asyncio.gather(*(_fetch_page(semaphore, s) for s in starts))
+
+        exhausted = False
+        for page_start, page in zip(starts, pages):
+            if not page:
+                if page is not None:
+                    logger.info("No more Indeed jobs found at start=%s", page_start)
+                exhausted = True
+                break
+            fresh, stop = state.process_page(page)
+            fresh = fresh[: max_jobs - scraped]
+            if fresh:
+                scraped += len(fresh)
+                yield fresh
+            if stop or len(page) < PAGE_SIZE or scraped >= max_jobs:
+                exhausted = True
                 break
 
-            for card in job_cards:
-                title_tag = card.find("h2", class_="jobTitle")
-                company_tag = card.find("span", class_="companyName")
-                location_tag = card.find("div", class_="companyLocation")
-                desc_tag = card.find("div", class_="job-snippet")
-
-                title = clean_text(title_tag.get_text() if title_tag else "")
-                company = clean_text(company_tag.get_text() if company_tag else "")
-                location = clean_text(location_tag.get_text() if location_tag else "")
-                description = clean_text(desc_tag.get_text() if desc_tag else "")
-                
-                salary = None
-                salary_tag = card.find("div", class_="salary-snippet")
-                if salary_tag:
-                    salary = parse_salary(clean_text(salary_tag.get_text()))
-
-                job_url = ""
-                # Extract job URL reliably
-                link_tag = card.find("a", href=True)
-                if link_tag:
-                    job_url = "https://www.indeed.com" + link_tag["href"]
-
-                job_dict = {
-                    "title": title,
-                    "company": company,
-                    "location": location,
-                    "salary": salary,
-                    "description": description,
-                    "job_url": job_url,
-                }
-                jobs.append(job_dict)
-                if len(jobs) >= max_jobs:
-                    break
-
-            start += len(job_cards)
-
-        except Exception as e:
-            logger.error("Error parsing Indeed jobs: %s", e)
+        if exhausted:
             break
+        start = starts[-1] + PAGE_SIZE
+
+    if owns_state:
+        await state.finish()
+    logger.info("Scraped %d new Indeed jobs", scraped)
 
-    logger.info("Scraped %d Indeed jobs", len(jobs))
-    return jobs
+async def scrape_indeed_jobs(max_jobs: int = 100, incremental: bool = True) -> List[Job]:
+    """All pages of iter_indeed_pages as one list."""
+    return [job async for page in iter_indeed_pages(max_jobs, incremental) for job in page]
@@ -1,8 +1,11 @@
+import re
 import json
 import logging
-from typing import List, Dict
-import httpx
+from typing import List, Dict, Optional, AsyncIterator
 from utils import safe_request, clean_text
+from scrape_state import IncrementalScrape
+from job import Job
+from job_key import canonical_job_id
 from config import LINKEDIN_COOKIES_PATH, RADIUS_MILES, POSTCODE, PART_TIME_ONLY
 
 logger = logging.getLogger("jobbot.scrape_linkedin")
@@ -34,48 +37,91 @@ def build_query_params(start: int = 0) -> Dict[str, str]:
         "count": "25",
     }
 
-async def scrape_linkedin_jobs(max_jobs: int = 100) -> List[Dict]:
-    jobs = []
+def _linkedin_job_id(job: Dict) -> Optional[str]:
+    """LinkedIn's numeric posting id, from the payload or the posting URL."""
+    if job.get("jobPostingId"):
+        return str(job["jobPostingId"])
+    for value in (job.get("entityUrn", ""), job.get("jobPostingUrl", "")):
+        match = re.search(r"(\d{6,})", value or "")
+        if match:
+            return match.group(1)
+    return None
+
+def job_from_linkedin(element: Dict) -> Job:
+    """Adapt one element of LinkedIn's job search payload to a Job."""
+    listed_at = element.get("listedAt")
+    title = clean_text(element.get("title", ""))
+    company = clean_text(element.get("companyName", ""))
+    location = clean_text(element.get("formattedLocation", ""))
+    url = element.get("jobPostingUrl", "")
+    return Job(
+        id=canonical_job_id("linkedin", _linkedin_job_id(element), url, title, company, location),
+        source="linkedin",
+        title=title,
+        company=company,
+        location=location,
+        salary=None,  # LinkedIn rarely has salary data
+        description=clean_text(element.get("descriptionSnippet", "")),
+        url=url,
+        posted_at=int(listed_at) // 1000 if listed_at else None,  # listedAt is epoch ms
+    )
+
+async def iter_linkedin_pages(
+    max_jobs: int = 100, incremental: bool = True, state: Optional[IncrementalScrape] = None
+) -> AsyncIterator[List[Job]]:
+    """
+    Yield LinkedIn result pages (lists of not-yet-seen jobs) in LinkedIn's own
+    order, as they arrive. With `incremental`, postings seen by earlier runs
+    are skipped. The query doesn't sort by date, so a known page says nothing
+    about the next one: pagination runs to max_jobs or the last page, and the
+    state should be created with newest_first=False (no high-water mark).
+    """
+    scraped = 0
     start = 0
+    owns_state = state is None
+    if owns_state:
+        state = IncrementalScrape("linkedin", enabled=incremental, newest_first=False)
+    await state.load()
 
-    async with httpx.AsyncClient(headers=HEADERS, timeout=15) as client:
-        while len(jobs) < max_jobs:
-            params = build_query_params(start)
-            response = await safe_request(client, "GET", BASE_URL, params=params)
-            if response is None:
-                logger.error(f"LinkedIn scrape failed at start={start}")
+    while scraped < max_jobs:
+        params = build_query_params(start)
+        response = await safe_request("GET", BASE_URL, headers=HEADERS, params=params)
+        if response is None:
+            logger.error(f"LinkedIn scrape failed at start={start}")
+            break
+
+        try:
+            text = response.text
+            if text.strip().startswith("<!DOCTYPE html>"):
+                logger.warning(f"LinkedIn returned HTML instead of JSON at start={start}")
                 break
 
-            try:
-                text = response.text
-                if text.strip().startswith("<!DOCTYPE html>"):
-                    logger.warning(f"LinkedIn returned HTML instead of JSON at start={start}")
-                    break
-
-                data = response.json()
-                elements = data.get("elements", [])
-                if not elements:
-                    logger.info(f"No more LinkedIn jobs found at start={start}")
-                    break
-
-                for job in elements:
-                    job_dict = {
-                        "title": clean_text(job.get("title", "")),
-                        "company": clean_text(job.get("companyName", "")),
-                        "location": clean_text(job.get("formattedLocation", "")),
-                        "salary": None,  # LinkedIn rarely has salary data
-                        "description": clean_text(job.get("descriptionSnippet", "")),
-                        "url": job.get("jobPostingUrl", ""),  # consistent key name
-                    }
-                    jobs.append(job_dict)
-                    if len(jobs) >= max_jobs:
-                        break
-
-                start += len(elements)
-
-            except Exception as e:
-                logger.error(f"Error parsing LinkedIn jobs at start={start}: {e}")
+            data = response.json()
+            elements = data.get("elements", [])
+            if not elements:
+                logger.info(f"No more LinkedIn jobs found at start={start}")
                 break
 
-    logger.info(f"Scraped {len(jobs)} LinkedIn jobs")
-    return jobs
+            page = [job_from_linkedin(element) for element in elements]
+
+            fresh, stop = state.process_page(page)
+            fresh = fresh[: max_jobs - scraped]
+            start += len(elements)
+
+        except Exception as e:
+            logger.error(f"Error parsing LinkedIn jobs at start={start}: {e}")
+            break
+
+        if fresh:
+            scraped += len(fresh)
+            yield fresh
+        if stop:
+            break
+
+    if owns_state:
+        await state.finish()
+    logger.info(f"Scraped {scraped} new LinkedIn jobs")
+
+async def scrape_linkedin_jobs(max_jobs: int = 100, incremental: bool = True) -> List[Job]:
+    """All pages of iter_linkedin_pages as one list."""
+    return [job async for page in iter_linkedin_pages(max_jobs, incremental) for job in page]
@@ -0,0 +1,79 @@
+import logging
+from typing import List, Dict, Any, Set, Tuple, Optional
+from config import SCRAPE_KNOWN_STOP_RATIO
+from async_db import get_async_db
+from job import Job
+
+logger = logging.getLogger("jobbot.scrape_state")
+db = get_async_db()
+
+
+class IncrementalScrape:
+    """
+    Per-run incremental scraping state for one source.
+
+    load() fetches the ids seen by earlier runs and the source's high-water
+    mark (the newest posting seen) at the start of a run. Results are sorted newest
+    first, so once a page is mostly known, or reaches the high-water mark,
+    later pages hold nothing new and pagination can stop. For a source listed
+    in another order (newest_first=False), seen jobs are still skipped but
+    pagination never stops early and no high-water mark is kept.
+    """
+
+    def __init__(self, source: str, enabled: bool = True, newest_first: bool = True):
+        self.source = source
+        self.enabled = enabled
+        self.newest_first = newest_first
+        self.seen: Set[str] = set()
+        self.high_water: Optional[Dict[str, Any]] = None
+        self.newest: Optional[Tuple[Optional[str], Optional[int]]] = None
+
+    async def load(self):
+        """Fetch the seen ids and high-water mark (on the DB threads, off the event loop)."""
+        if self.enabled:
+            self.seen = await db.get_seen_job_ids(self.source)
+            self.high_water = await db.get_high_water_mark(self.source)
+
+    def process_page(self, page: List[Job]) -> Tuple[List[Job], bool]:
+        """Return the page's not-yet-seen jobs and whether pagination should stop after it."""
+        self._track_newest(page)
+        if not self.enabled or not page:
+            return page, False
+
+        known = sum(1 for job in page if job.id in self.seen)
+        fresh = [job for job in page if job.id not in self.seen]
+        if not self.newest_first:
+            return fresh, False
+        mostly_known = known / len(page) >= SCRAPE_KNOWN_STOP_RATIO
+        if mostly_known or self._reached_high_water(page):
+            logger.info(
+                f"{self.source}: stopping early, {known}/{len(page)} jobs on page already seen"
+                f"{'' if mostly_known else ' (reached high-water mark)'}."
+            )
+            return fresh, True
+        return fresh, False
+
+    def _reached_high_water(self, page: List[Job]) -> bool:
+        if not self.high_water:
+            return False
+        hw_id, hw_posted = self.high_water["job_id"], self.high_water["posted_at"]
+        for job in page:
+            if hw_id and job.id == hw_id:
+                return True
+            if hw_posted and job.posted_at and job.posted_at < hw_posted:
+                return True
+        return False
+
+    def _track_newest(self, page: List[Job]):
+        for job in page:
+            candidate = (job.id, job.posted_at)
+            if self.newest is None:
+                # Results are newest-first, so the first job is the newest unless timestamps say otherwise
+                self.newest = candidate
+            elif candidate[1] and (not self.newest[1] or candidate[1] > self.newest[1]):
+                self.newest = candidate
+
+    async def finish(self):
+        """Persist the high-water mark for the next run."""
+        if self.newest_first and self.newest is not None and self.newest != (None, None):
+            await db.set_high_water_mark(self.source, *self.newest)
@@ -0,0 +1,178 @@
+"""
+Streaming scrape -> rank -> store run.
+
+The stages run concurrently, connected by bounded asyncio queues, so a slow
+stage holds back the ones feeding it (backpressure) and only a few pages and
+batches are in memory at any time:
+
+    scrapers --pages--> batcher --micro-batches--> rankers --ranked--> store
+
+The batcher dedupes each page against everything earlier in the run and
+groups jobs into RANK_CHUNK_SIZE batches, ranking a partial batch once no page
+has arrived for STREAM_BATCH_WAIT_SECONDS. RANKER_WORKERS rankers keep the
+worker pool busy. The store stage saves each ranked batch in one transaction
+and only then marks the batch's jobs, and the scraped duplicates merged into
+them, as seen. A batch the ranker fails on is skipped and not marked seen, so
+its jobs are ranked again next run.
+Each scraper's high-water mark is saved only once the whole run has stored
+its jobs, and not at all if that scraper failed part way.
+"""
+import asyncio
+import logging
+from typing import List, Dict, Any, AsyncIterator, Optional
+from job import Job
+import ranking_worker
+from async_db import get_async_db
+from job_key import DedupIndex, dedupe_jobs
+from scrape_state import IncrementalScrape
+from scrape_linkedin import iter_linkedin_pages
+from scrape_indeed import iter_indeed_pages
+from config import RANK_CHUNK_SIZE, RANKER_WORKERS, STREAM_QUEUE_PAGES, STREAM_BATCH_WAIT_SECONDS
+
+logger = logging.getLogger("jobbot.stream_pipeline")
+db = get_async_db()
+
+# End-of-input marker passed down each queue
+_DONE = None
+
+
+async def _scrape(
+    sources: List[AsyncIterator[List[Job]]], pages: asyncio.Queue, totals: Dict[str, int]
+) -> List[bool]:
+    """Feed every source's pages into `pages`. Returns whether each source ran to completion."""
+    async def drain(source: AsyncIterator[List[Job]]):
+        async for page in source:
+            totals["scraped"] += len(page)
+            await pages.put(page)
+
+    results = await asyncio.gather(*(drain(source) for source in sources), return_exceptions=True)
+    for result in results:
+        # One site failing shouldn't lose the other's jobs
+        if isinstance(result, Exception):
+            logger.error("Scraper failed mid-run.", exc_info=result)
+    await pages.put(_DONE)
+    return [not isinstance(result, Exception) for result in results]
+
+
+async def _get(queue: asyncio.Queue, timeout: float):
+    """queue.get() giving [] after `timeout` seconds. Unlike wait_for() on 3.11, never swallows a cancel."""
+    getter = asyncio.ensure_future(queue.get())
+    try:
+        done, _ = await asyncio.wait({getter}, timeout=timeout)
+    finally:
+        if not getter.done():
+            getter.cancel()
+    return getter.result() if done else []
+
+
+async def _batch(
+    pages: asyncio.Queue, batches: asyncio.Queue, totals: Dict[str, int], batch_size: int, max_wait: float, rankers: int
+):
+    index = DedupIndex()
+    unique: List[Job] = []
+    # Each scraped job travels with the batch holding the job kept for it, so it is
+    # only marked seen once that job is stored. Keyed by the kept Job object.
+    followers: Dict[int, List[Job]] = {}
+    # Duplicates of jobs already sent on; they go with the next batch
+    late: List[Job] = []
+    done = False
+    while not done:
+        page = await _get(pages, max_wait) if unique else await pages.get()
+        if page is _DONE:
+            done = True
+        elif page:
+            kept, merged = dedupe_jobs(page, index)
+            totals["merged"] += merged
+            unique.extend(kept)
+            for job in kept:
+                followers[id(job)] = []
+            for job in page:
+                owner = index.ids.get(job.id, job) if job.id else job
+                followers.get(id(owner), late).append(job)
+
+        while len(unique) >= batch_size or ((done or not page) and (unique or late)):
+            batch, unique = unique[:batch_size], unique[batch_size:]
+            scraped = [seen for job in batch for seen in followers.pop(id(job))] + late
+            late = []
+            await batches.put((batch, scraped))
+
+    for _ in range(rankers):
+        await batches.put(_DONE)
+
+
+async def _rank(batches: asyncio.Queue, ranked: asyncio.Queue):
+    while True:
+        batch = await batches.get()
+        if batch is _DONE:
+            break
+        jobs, scraped = batch
+        try:
+            result = await ranking_worker.rank_chunk_async(jobs)
+        except Exception:
+            # Skip the batch without marking it seen, so the next run ranks these jobs again
+            logger.exception(f"[SEMANTIC_FAIL] Could not rank a batch of {len(jobs)} jobs; skipping it.")
+            continue
+        await ranked.put((result, scraped))
+    await ranked.put(_DONE)
+
+
+async def _store(ranked: asyncio.Queue, totals: Dict[str, int], rankers: int):
+    remaining = rankers
+    while remaining:
+        item = await ranked.get()
+        if item is _DONE:
+            remaining -= 1
+            continue
+        jobs, scraped = item
+        if jobs:
+            counts = await db.save_jobs(jobs)
+            totals["ranked"] += len(jobs)
+            for key, value in counts.items():
+                totals[key] += value
+        # Only after saving: the prefilter drops ids that are already seen
+        if scraped:
+            await db.mark_jobs_seen(scraped)
+
+
+async def run_scrape_pipeline(
+    sources: Optional[List[AsyncIterator[List[Job]]]] = None,
+    batch_size: int = RANK_CHUNK_SIZE,
+    rankers: int = RANKER_WORKERS,
+    states: Optional[List[Optional[IncrementalScrape]]] = None,
+) -> Dict[str, Any]:
+    """
+    Scrape all sources, rank and store their jobs as they stream in.
+    `states` pairs each source with the IncrementalScrape it was given,
+    finished here once everything is stored.
+    Returns totals: scraped, merged (cross-source duplicates), ranked (kept by
+    the ranker), inserted, updated, skipped.
+    """
+    if sources is None:
+        # Neither site's query sorts by date, so neither can stop at a high-water mark
+        states = [IncrementalScrape(source, newest_first=False) for source in ("linkedin", "indeed")]
+        sources = [iter_linkedin_pages(state=states[0]), iter_indeed_pages(state=states[1])]
+    states = states or [None] * len(sources)
+    totals = dict.fromkeys(("scraped", "merged", "ranked", "inserted", "updated", "skipped"), 0)
+    pages: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_PAGES)
+    batches: asyncio.Queue = asyncio.Queue(maxsize=rankers)
+    ranked: asyncio.Queue = asyncio.Queue(maxsize=rankers * 2)
+
+    tasks = [
+        asyncio.create_task(_scrape(sources, pages, totals)),
+        asyncio.create_task(_batch(pages, batches, totals, batch_size, STREAM_BATCH_WAIT_SECONDS, rankers)),
+        *(asyncio.create_task(_rank(batches, ranked)) for _ in range(rankers)),
+        asyncio.create_task(_store(ranked, totals, rankers)),
+    ]
+    try:
+        completed, *_ = await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed stage (or cancellation) stops the whole run; nothing unsaved is marked seen.
+        # End markers are only sent on success, so no cancelled stage waits on a full queue.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    for state, ok in zip(states, completed):
+        if state is not None and ok:
+            await state.finish()
+    return totals
@@ -1,73 +1,117 @@
 import logging
 import asyncio
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes
-from db import DBHandler
+from typing import List
+from telegram import Update, InlineKeyboardMarkup
+from telegram.ext import Application, ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes
+from async_db import get_async_db
+from db import format_uptime
+from delivery import get_delivery_queue, job_keyboard
+from job import Job
+from scheduler import scheduler
 from utils import format_job_message
 from config import TELEGRAM_BOT_TOKEN
 
 logger = logging.getLogger("jobbot.telegram_bot")
-db = DBHandler()
+db = get_async_db()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("Job Bot is online. Use /status to check bot status.")
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    total_scraped = db.count_scraped_jobs()
-    total_sent = db.count_sent_jobs()
-    total_accepted = db.count_accepted_jobs()
-    uptime = db.get_bot_uptime()
-    pending_jobs = db.count_pending_jobs()
+    # Trigger-maintained counters, so this is one small read however large jobs grows
+    stats = await db.get_stats()
 
     msg = (
         f"📊 Bot Status:\n"
-        f"• Jobs scraped: {total_scraped}\n"
-        f"• Jobs sent: {total_sent}\n"
-        f"• Jobs accepted: {total_accepted}\n"
-        f"• Pending jobs: {pending_jobs}\n"
-        f"• Uptime: {uptime}\n"
+        f"• Jobs scraped: {stats['scraped_jobs']}\n"
+        f"• Jobs sent: {stats['sent_jobs']}\n"
+        f"• Jobs accepted: {stats['accepted_jobs']}\n"
+        f"• Pending jobs: {stats['pending_jobs']}\n"
+        f"• Uptime: {format_uptime(stats['bot_started_at'])}\n"
     )
+    for name, next_run in scheduler.next_runs().items():
+        msg += f"• Next {name}: {next_run:%a %H:%M %Z}\n" if next_run else f"• Next {name}: not scheduled\n"
     await update.message.reply_text(msg)
 
 async def sendjob(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    job = db.get_random_pending_job()
+    # Jobs already offered in this chat session aren't offered again until the pool runs out
+    offered = context.user_data.setdefault("offered_job_ids", set())
+    job = await db.get_random_pending_job(exclude=offered)
+    if not job and offered:
+        offered.clear()
+        job = await db.get_random_pending_job()
     if not job:
         await update.message.reply_text("No pending jobs available to send.")
         return
+    offered.add(job.id)
 
     msg = format_job_message(job)
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("✅ Accept", callback_data=f"accept:{job['id']}"),
-         InlineKeyboardButton("❌ Decline", callback_data=f"decline:{job['id']}")]
-    ])
-    await update.message.reply_text(msg, reply_markup=keyboard)
+    await update.message.reply_text(msg, reply_markup=job_keyboard([job]))
 
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
-    await query.answer()
     data = query.data
     user = query.from_user
 
-    action, job_id = data.split(":")
-    job = db.get_job_by_id(job_id)
+    # Job ids contain ":" themselves ("indeed:<jk>"), so only split off the action
+    action, job_id = data.split(":", 1)
+    job = await db.get_job_by_id(job_id)
 
     if not job:
+        await query.answer()
         await query.edit_message_text("Job no longer available.")
         return
 
     if action == "accept":
-        db.mark_job_accepted(job_id, user.id)
+        await db.mark_job_accepted(job_id, user.id)
+    elif action == "decline":
+        await db.mark_job_declined(job_id, user.id)
+
+    keyboard = query.message.reply_markup.inline_keyboard if query.message.reply_markup else ()
+    if len(keyboard) > 1:
+        # Digest message: drop this job's buttons and keep the rest of the digest as it is
+        await query.answer(f"{'✅ Accepted' if action == 'accept' else '❌ Declined'}: {job.title}")
+        remaining = [row for row in keyboard if not any(button.callback_data.endswith(f":{job_id}") for button in row)]
+        await query.edit_message_reply_markup(InlineKeyboardMarkup(remaining))
+        return
+
+    await query.answer()
+    if action == "accept":
         await query.edit_message_text(f"✅ You accepted the job:\n\n{format_job_message(job)}")
         # Trigger auto-apply process externally
     elif action == "decline":
-        db.mark_job_declined(job_id, user.id)
         await query.edit_message_text("❌ Job declined and removed from your feed.")
 
+async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /search <words> [source:indeed|linkedin] [pending]
+    words, filters = [], {}
+    for arg in context.args:
+        if arg.lower().startswith("source:"):
+            filters["source"] = arg.split(":", 1)[1].lower()
+        elif arg.lower() == "pending":
+            filters["pending"] = True
+        else:
+            words.append(arg)
+    if not words:
+        await update.message.reply_text("Usage: /search <words> [source:indeed|linkedin] [pending]")
+        return
+
+    jobs = await db.search_jobs(" ".join(words), filters, limit=10)
+    if not jobs:
+        await update.message.reply_text("No stored jobs match that search.")
+        return
+
+    lines = [f"🔎 Top {len(jobs)} matches:"]
+    for i, job in enumerate(jobs, 1):
+        lines.append(f"{i}. {job.title} – {job.company} ({job.location})\n   {job.url}")
+    await update.message.reply_text("\n".join(lines), disable_web_page_preview=True)
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg = (
         "🤖 Job Bot Commands:\n"
         "/status - Show bot statistics\n"
         "/sendjob - Send one random job\n"
+        "/search <words> - Search stored jobs\n"
         "/help - Show this message\n"
         "/accepted - List accepted jobs\n"
         "/pending - List pending jobs\n"
@@ -75,14 +119,48 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     await update.message.reply_text(msg)
 
-def run_telegram_bot():
-    app = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+async def send_jobs_to_telegram(jobs: List[Job]) -> int:
+    """Queue jobs in the outbox and deliver everything undelivered to TELEGRAM_CHAT_ID. Returns jobs delivered."""
+    queue = await get_delivery_queue()
+    return await queue.deliver(jobs)
+
+async def on_startup(app: Application):
+    await db.record_bot_start()
+    # Deliveries go out through the Application's bot and share its HTTP connection pool
+    await get_delivery_queue(bot=app.bot)
+
+def build_application() -> Application:
+    app = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).post_init(on_startup).build()
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("status", status))
     app.add_handler(CommandHandler("sendjob", sendjob))
+    app.add_handler(CommandHandler("search", search))
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(CallbackQueryHandler(button_handler))
+    return app
+
+async def start_telegram_bot() -> Application:
+    """Start polling on the running event loop without blocking it; pair with stop_telegram_bot()."""
+    app = build_application()
+    await app.initialize()
+    # post_init only runs under run_polling(), so call it ourselves
+    await on_startup(app)
+    await app.start()
+    await app.updater.start_polling()
+    logger.info("Telegram bot started.")
+    return app
 
+async def stop_telegram_bot(app: Application):
+    if app.updater.running:
+        await app.updater.stop()
+    if app.running:
+        await app.stop()
+    await app.shutdown()
+    logger.info("Telegram bot stopped.")
+
+def run_telegram_bot():
+    """Run the bot on its own, blocking until interrupted (the service entry point is job_pipeline.main)."""
+    app = build_application()
     logger.info("Starting Telegram bot...")
     app.run_polling()
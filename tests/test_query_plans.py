@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import DBHandler, HOT_QUERIES  # noqa: E402
+
+
+class QueryPlanTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db = DBHandler(os.path.join(tmp.name, "jobs.db"))
+
+    def test_hot_queries_use_their_indexes(self):
+        # A missing or unusable index shows up as a full table scan or a temp B-tree sort
+        self.assertEqual(self.db.check_query_plans(), {})
+
+    def test_every_hot_query_is_planned(self):
+        self.assertEqual(set(self.db.explain_hot_queries()), set(HOT_QUERIES))
+
+
+if __name__ == "__main__":
+    unittest.main()
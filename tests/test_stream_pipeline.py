@@ -0,0 +1,152 @@
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+# The pipeline modules open the default database on import; keep it out of the checkout
+_tmp = tempfile.mkdtemp()
+os.chdir(_tmp)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stream_pipeline  # noqa: E402
+from job import Job  # noqa: E402
+
+
+async def _pages(count: int, size: int = 3):
+    for page in range(count):
+        yield [Job(id=f"test:{page}:{i}", source="test", title=f"Role {page} {i}", company=f"Co {page}") for i in range(size)]
+
+
+class FakeDB:
+    def __init__(self):
+        self.saved = []
+        self.seen = []
+
+    async def save_jobs(self, jobs):
+        self.saved.extend(jobs)
+        return {"inserted": len(jobs), "updated": 0, "skipped": 0}
+
+    async def mark_jobs_seen(self, jobs):
+        self.seen.extend(jobs)
+
+
+class FakeState:
+    def __init__(self):
+        self.finished = False
+
+    async def finish(self):
+        self.finished = True
+
+
+class StreamPipelineTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.db = FakeDB()
+        patcher = mock.patch.object(stream_pipeline, "db", self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_ranks_and_stores_every_page(self):
+        async def rank(jobs):
+            return jobs
+
+        state = FakeState()
+        with mock.patch.object(stream_pipeline.ranking_worker, "rank_chunk_async", rank):
+            totals = await asyncio.wait_for(
+                stream_pipeline.run_scrape_pipeline([_pages(20)], batch_size=4, rankers=2, states=[state]), timeout=10
+            )
+        self.assertEqual(totals["scraped"], 60)
+        self.assertEqual(len(self.db.saved), 60)
+        self.assertEqual(len(self.db.seen), 60)
+        self.assertTrue(state.finished)
+
+    async def test_failed_scraper_keeps_its_high_water_mark(self):
+        async def rank(jobs):
+            return jobs
+
+        async def broken():
+            yield [Job(id="broken:1", source="broken", title="Driver", company="Van Co")]
+            raise RuntimeError("site changed")
+
+        good, bad = FakeState(), FakeState()
+        with mock.patch.object(stream_pipeline.ranking_worker, "rank_chunk_async", rank):
+            await asyncio.wait_for(
+                stream_pipeline.run_scrape_pipeline([_pages(2), broken()], batch_size=2, rankers=1, states=[good, bad]),
+                timeout=10,
+            )
+        self.assertTrue(good.finished)
+        self.assertFalse(bad.finished)
+
+    async def test_failed_ranking_batches_are_not_marked_seen(self):
+        async def rank(jobs):
+            if jobs[0].id.startswith("test:1:"):
+                raise RuntimeError("model failed")
+            return jobs
+
+        with mock.patch.object(stream_pipeline.ranking_worker, "rank_chunk_async", rank):
+            await asyncio.wait_for(
+                stream_pipeline.run_scrape_pipeline([_pages(3)], batch_size=3, rankers=1), timeout=10
+            )
+        stored = {job.id for job in self.db.seen}
+        self.assertEqual(stored, {job.id for job in self.db.saved})
+        self.assertEqual(len(stored), 6)
+        self.assertFalse(any(job_id.startswith("test:1:") for job_id in stored))
+
+    async def test_failed_ranking_batches_are_not_marked_seen_across_pages(self):
+        # Pages of 25 split across batches of 64: the second batch holds the end of page 2 and all of page 3
+        calls = []
+
+        async def rank(jobs):
+            calls.append(jobs)
+            if len(calls) == 2:
+                raise RuntimeError("worker died")
+            return jobs
+
+        with mock.patch.object(stream_pipeline.ranking_worker, "rank_chunk_async", rank):
+            totals = await asyncio.wait_for(
+                stream_pipeline.run_scrape_pipeline([_pages(3, size=25)], batch_size=64, rankers=1), timeout=10
+            )
+        saved = {job.id for job in self.db.saved}
+        merged = {dup for job in self.db.saved for dup in job.duplicate_ids or ()}
+        seen = {job.id for job in self.db.seen}
+        self.assertEqual(len(saved), 64)
+        self.assertEqual(seen, saved | merged)
+        self.assertEqual(totals["scraped"], 75)
+        self.assertFalse(seen & {job.id for job in calls[1]})
+
+    async def test_store_failure_stops_the_run(self):
+        async def rank(jobs):
+            return jobs
+
+        async def save_jobs(jobs):
+            raise RuntimeError("disk full")
+
+        self.db.save_jobs = save_jobs
+        state = FakeState()
+        with mock.patch.object(stream_pipeline.ranking_worker, "rank_chunk_async", rank):
+            with self.assertRaises(RuntimeError):
+                # Many more pages than the queues hold, so upstream stages are blocked on put() when it fails
+                await asyncio.wait_for(
+                    stream_pipeline.run_scrape_pipeline([_pages(50)], batch_size=2, rankers=1, states=[state]),
+                    timeout=5,
+                )
+        self.assertEqual(self.db.seen, [])
+        # The next run must not stop at a high-water mark covering jobs that were never stored
+        self.assertFalse(state.finished)
+
+    async def test_cancelled_run_stops(self):
+        async def rank(jobs):
+            await asyncio.sleep(0.05)
+            return jobs
+
+        with mock.patch.object(stream_pipeline.ranking_worker, "rank_chunk_async", rank):
+            run = asyncio.create_task(stream_pipeline.run_scrape_pipeline([_pages(50)], batch_size=2, rankers=1))
+            await asyncio.sleep(0.2)
+            run.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await asyncio.wait_for(run, timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,108 @@
-import requests
+import httpx
+import asyncio
+import random
+import time
+import importlib.util
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
 from typing import Optional, Dict, Any
 import json
 import logging
+from config import (
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_PER_HOST_LIMIT,
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_MIN_REFETCH_SECONDS,
+)
+from http_cache import HTTPCache
 
 logger = logging.getLogger("jobbot.utils")
 
+# Hourly rates are annualised assuming 40h/week * 52 weeks
+HOURS_PER_YEAR = 40 * 52
 
-def safe_request(
+# Status codes worth retrying with backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_http_client: Optional[httpx.AsyncClient] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+_request_metrics: Dict[str, Dict[str, float]] = {}
+http_cache = HTTPCache()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide async HTTP client. Connections are pooled and kept
+    alive across requests and scrape runs; HTTP/2 is used when h2 is installed.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=15,
+            follow_redirects=True,
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client and its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _host_semaphores.clear()
+
+
+def _host_semaphore(host: str) -> asyncio.Semaphore:
+    if host not in _host_semaphores:
+        _host_semaphores[host] = asyncio.Semaphore(HTTP_PER_HOST_LIMIT)
+    return _host_semaphores[host]
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Exponential backoff with full jitter, overridden by a Retry-After header if present."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), HTTP_BACKOFF_MAX)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    return min(max((when - datetime.now(timezone.utc)).total_seconds(), 0.0), HTTP_BACKOFF_MAX)
+                except (TypeError, ValueError):
+                    pass
+    return random.uniform(0, min(HTTP_BACKOFF_BASE * 2 ** attempt, HTTP_BACKOFF_MAX))
+
+
+def _record_latency(host: str, elapsed: float, failed: bool):
+    stats = _request_metrics.setdefault(host, {"requests": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+    stats["requests"] += 1
+    stats["errors"] += int(failed)
+    stats["total_s"] += elapsed
+    stats["max_s"] = max(stats["max_s"], elapsed)
+
+
+def get_request_metrics(reset: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Per-host request counts, error counts and latency (avg/max seconds) since
+    startup or the last reset; `reset` starts a new period.
+    """
+    metrics = {
+        host: {**stats, "avg_s": stats["total_s"] / stats["requests"] if stats["requests"] else 0.0}
+        for host, stats in _request_metrics.items()
+    }
+    if reset:
+        _request_metrics.clear()
+    return metrics
+
+
+async def safe_request(
     method: str,
     url: str,
     headers: Optional[Dict[str, str]] = None,
@@ -14,20 +110,75 @@ def safe_request(
     data: Optional[Any] = None,
     json_data: Optional[Dict[str, Any]] = None,
     timeout: int = 15,
-) -> Optional[requests.Response]:
+    max_retries: int = HTTP_MAX_RETRIES,
+    use_cache: bool = HTTP_CACHE_ENABLED,
+    min_refetch_seconds: float = HTTP_CACHE_MIN_REFETCH_SECONDS,
+) -> Optional[httpx.Response]:
     """
-    Safe HTTP request wrapper with error handling and logging.
-    Supports GET, POST, etc.
+    Safe async HTTP request wrapper with error handling and logging.
+    Uses the shared client, limits concurrency per host and retries transport
+    errors, 429 and 5xx responses with exponential backoff (honouring Retry-After).
+    GETs go through the on-disk HTTP cache: a URL fetched less than
+    min_refetch_seconds ago is served from disk, otherwise the request is
+    sent conditionally and a 304 reuses the cached body. Cache reads and
+    writes run in a worker thread so disk I/O doesn't block the event loop.
+    Returns None if the request ultimately fails.
     """
-    try:
-        response = requests.request(
-            method=method, url=url, headers=headers, params=params, data=data, json=json_data, timeout=timeout
-        )
-        response.raise_for_status()
-        return response
-    except requests.RequestException as e:
-        logger.error(f"HTTP {method} request to {url} failed: {e}")
-        return None
+    host = urlsplit(url).hostname or ""
+    client = get_http_client()
+
+    cache_key = cached = None
+    if use_cache and method.upper() == "GET" and data is None and json_data is None:
+        cache_key = http_cache.key(url, params)
+        cached = await asyncio.to_thread(http_cache.get, cache_key)
+        if cached is not None:
+            if time.time() - cached["fetched_at"] < min_refetch_seconds:
+                logger.debug(f"HTTP cache hit for {url}")
+                return http_cache.to_response(cached)
+            headers = {**(headers or {}), **http_cache.conditional_headers(cached)}
+
+    async with _host_semaphore(host):
+        for attempt in range(max_retries + 1):
+            started = time.perf_counter()
+            response = None
+            try:
+                response = await client.request(
+                    method, url, headers=headers, params=params, data=data, json=json_data, timeout=timeout
+                )
+            except httpx.HTTPError as e:
+                error = e
+            else:
+                error = None
+            elapsed = time.perf_counter() - started
+            failed = error is not None or response.status_code >= 400
+            _record_latency(host, elapsed, failed)
+            logger.debug(f"HTTP {method} {url} -> {response.status_code if response else error} in {elapsed:.2f}s")
+
+            retryable = error is not None or response.status_code in RETRY_STATUSES
+            if retryable and attempt < max_retries:
+                delay = _retry_delay(attempt, response)
+                logger.warning(
+                    f"HTTP {method} {url} failed ({response.status_code if response else error}), "
+                    f"retry {attempt + 1}/{max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            if error is not None:
+                logger.error(f"HTTP {method} request to {url} failed: {error}")
+                return None
+            if response.status_code == 304 and cached is not None:
+                await asyncio.to_thread(http_cache.touch, cache_key, cached)
+                return http_cache.to_response(cached)
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(f"HTTP {method} request to {url} failed: {e}")
+                return None
+            if cache_key is not None:
+                await asyncio.to_thread(http_cache.put, cache_key, response)
+            return response
+    return None
 
 
 def clean_text(text: str) -> str:
@@ -58,10 +209,46 @@ def parse_salary(salary_str: str) -> Optional[float]:
     value = float(match.group(1))
     # Convert hourly to annual (roughly 40h/week * 52 weeks)
     if "hour" in salary_str:
-        value *= 40 * 52
+        value *= HOURS_PER_YEAR
     return value
 
 
+def salary_period(salary_str: str) -> Optional[str]:
+    """
+    "hour" or "year": how a salary string was advertised, or None without one.
+    parse_salary annualises hourly rates, so this is how to tell them apart.
+    """
+    if not salary_str:
+        return None
+    return "hour" if "hour" in salary_str.lower() else "year"
+
+
+def format_job_message(job) -> str:
+    """
+    Render a job (a job.Job) as a plain-text Telegram message.
+    """
+    lines = [f"💼 {job.title or 'Untitled role'}"]
+    if job.company:
+        rating = job.company_rating
+        lines.append(f"🏢 {job.company}" + (f" (rated {rating:g}/10)" if rating is not None else ""))
+    if job.location:
+        lines.append(f"📍 {job.location}")
+    if job.salary:
+        lines.append(f"💷 {job.salary}")
+    if job.cv_match_score is not None:
+        lines.append(f"🎯 CV match: {job.cv_match_score * 100:.0f}%")
+    if job.company_summary:
+        lines.append(f"📝 {job.company_summary}")
+    if job.description:
+        description = job.description
+        lines.append("")
+        lines.append(description if len(description) <= 500 else description[:497] + "...")
+    if job.url:
+        lines.append("")
+        lines.append(job.url)
+    return "\n".join(lines)
+
+
 def chunk_list(lst: list, chunk_size: int) -> list[list]:
     """
     Split list into chunks of chunk_size.